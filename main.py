@@ -1,33 +1,141 @@
 #!/usr/bin/env python3
+import time
+
+# Measured here so the import phase can be reported by --profile
+_IMPORT_WALL_START = time.perf_counter()
+_IMPORT_CPU_START = time.process_time()
+
 import argparse
 import sys
 from models import User, Project, Task
+from utils.archive import ArchivePolicy
+from utils.completion import bash_script
 from utils.data_manager import DataManager
+from utils.profiler import Profiler
+from utils.query import Query, QueryEngine, format_row
+from utils.reports import ReportStore
 from utils.helpers import (
     print_header, print_separator, confirm_action, 
     get_input, display_list, format_date, validate_date
 )
 
+# Commands that change data; they hold the writer lock from their first read to their save
+# (delete-user and delete-project take it themselves, after asking for confirmation)
+WRITE_COMMANDS = {
+    'add-user', 'add-project', 'add-task', 'complete-task', 'update-task-status', 'archive',
+}
+
+_IMPORT_WALL = time.perf_counter() - _IMPORT_WALL_START
+_IMPORT_CPU = time.process_time() - _IMPORT_CPU_START
+
 
 class ProjectManagerCLI:
-    def __init__(self):
+    def __init__(self, profiler=None):
+        self.profiler = profiler or Profiler()
         self.data_manager = DataManager()
-        self.users = self.data_manager.load_users()
+        # All users are only loaded (keyed by email) when a command needs them;
+        # commands scoped to one email load just that user
+        self._users = None
+        self._single_users = {}
+        self._deleted_emails = set()
+        self.archive_policy = ArchivePolicy.from_env()
+        self._reports = None
+    
+    @property
+    def users(self):
+        if self._users is None:
+            with self.profiler.phase('load_users'):
+                self._users = {user.email: user for user in self.data_manager.load_users()}
+            # Keep any changes already made to users loaded on their own
+            self._users.update(self._single_users)
+            for email in self._deleted_emails:
+                self._users.pop(email, None)
+        return list(self._users.values())
+    
+    def reload(self):
+        # Forget everything read so far, e.g. after switching to a newer generation
+        self._users = None
+        self._single_users = {}
+        self._deleted_emails = set()
+        self._reports = None
+    
+    @property
+    def reports(self):
+        # Must be loaded before the data file changes so it can be checked against it
+        if self._reports is None:
+            self._reports = ReportStore(self.data_manager.data_dir)
+            self._reports.load(self.data_manager.users_file)
+        return self._reports
     
     def save_data(self):
-        self.data_manager.save_users(self.users)
+        reports = self.reports
+        
+        if self.archive_policy:
+            with self.profiler.phase('archive'):
+                users = self._users if self._users is not None else self._single_users
+                task_count, project_count = self.data_manager.archive.archive_users(
+                    list(users.values()), self.archive_policy)
+            if task_count or project_count:
+                print(f"Auto-archived {task_count} completed task(s) and {project_count} closed project(s) "
+                      f"(see --include-archived)")
+        
+        with self.profiler.phase('save_users'):
+            if self._users is not None:
+                saved = self.data_manager.save_users(list(self._users.values()))
+            else:
+                # One generation for the whole command, so readers never see half of it
+                saved = self.data_manager.save_changes(self._single_users.values(),
+                                                       self._deleted_emails)
+        
+        if saved:
+            # Only now, so a failed save leaves the archive as it was
+            self.data_manager.archive.commit()
+            reports.save(self.data_manager.users_file)
+        else:
+            self.data_manager.archive.discard()
+            print("Error: changes were not saved.")
+        return saved
+    
+    def find_user(self, email):
+        with self.profiler.phase('lookup'):
+            if self._users is not None:
+                return self._users.get(email)
+            
+            if email not in self._single_users:
+                with self.profiler.phase('load_user'):
+                    user = self.data_manager.load_user(email)
+                if not user:
+                    return None
+                self._single_users[email] = user
+            return self._single_users[email]
+    
+    def user_exists(self, email):
+        with self.profiler.phase('lookup'):
+            if self._users is not None:
+                return email in self._users
+            if email in self._deleted_emails:
+                return False
+            return email in self._single_users or self.data_manager.user_exists(email)
     
     def add_user(self, args):
         # Check if user with this email already exists
-        if self.data_manager.find_user_by_email(self.users, args.email):
+        if self.user_exists(args.email):
             print(f"Error: A user with email {args.email} already exists!")
             return
         
+        if self._users is None:
+            self.data_manager.sync_next_ids()
+        
         try:
             # Create new user
             user = User(name=args.name, email=args.email)
-            self.users.append(user)
-            self.save_data()
+            if self._users is not None:
+                self._users[user.email] = user
+            else:
+                self._single_users[user.email] = user
+            self.reports.user_added(user.email)
+            if not self.save_data():
+                return
             
             print(f"\n✓ User created successfully!")
             print(user)
@@ -39,25 +147,99 @@ class ProjectManagerCLI:
         display_list(self.users, title="All Users", empty_message="No users found")
     
     def delete_user(self, args):
-        user = self.data_manager.find_user_by_email(self.users, args.email)
-        
+        user = self.find_user_to_delete(args)
         if not user:
-            print(f"Error: User with email {args.email} not found!")
             return
         
-        # Confirm deletion
+        # Confirm deletion before taking the writer lock, so an unanswered
+        # prompt doesn't hold up other commands
         if not confirm_action(f"Delete user {user.name} and all their projects?"):
             print("Cancelled.")
             return
         
-        self.users.remove(user)
-        self.save_data()
+        with self.data_manager.write_lock():
+            # The data may have changed while we were waiting for an answer
+            self.reload()
+            user = self.find_user_to_delete(args)
+            if user:
+                self.delete_user_cascade(user, args)
+    
+    def find_user_to_delete(self, args):
+        user = self.find_user(args.email)
+        
+        if not user:
+            print(f"Error: User with email {args.email} not found!")
+            return None
+        
+        if args.reassign_to:
+            if args.reassign_to == user.email:
+                print("Error: Cannot reassign tasks to the user being deleted!")
+                return None
+            if not self.user_exists(args.reassign_to):
+                print(f"Error: User with email {args.reassign_to} not found!")
+                return None
+        return user
+    
+    def delete_user_cascade(self, user, args):
+        changed = self.reassign_tasks(user.email, args.reassign_to)
+        # Their archived work goes too, and archived tasks assigned to them are updated
+        removed, archived_changed = self.data_manager.archive.remove_owner(user.email, args.reassign_to)
+        for _, _, task in archived_changed:
+            self.reports.task_reassigned(task, user.email)
+        self.reports.user_removed(user, removed)
+        self.remove_user(user.email)
+        if not self.save_data():
+            return
         print(f"✓ User {user.name} deleted successfully!")
+        
+        lines = [f"{owner_email} / [{project.project_id}] {project.title} / {task}"
+                 for owner_email, project, task in changed]
+        lines += [f"{owner_email} / [{project_id}] (archived) / {task}"
+                  for owner_email, project_id, task in archived_changed]
+        if lines:
+            action = f"Reassigned to {args.reassign_to}" if args.reassign_to else "Unassigned"
+            display_list(lines, title=f"{action}: {len(lines)} task(s)")
+    
+    def reassign_tasks(self, email, new_assignee=None):
+        # The assignee postings are a reverse index from a user to the tasks
+        # pointing at them, so only the affected owners need loading
+        locations = self.data_manager.find_assigned_tasks(email)
+        if locations is None:
+            locations = [
+                (owner.email, project.project_id, task.task_id)
+                for owner in self.users
+                for project in owner.projects
+                for task in project.tasks
+                if task.assigned_to == email
+            ]
+        
+        changed = []
+        for owner_email, project_id, task_id in locations:
+            if owner_email == email:
+                # Goes away with the user's own projects
+                continue
+            owner = self.find_user(owner_email)
+            project = owner.get_project(project_id) if owner else None
+            task = project.get_task(task_id) if project else None
+            if not task or task.assigned_to != email:
+                continue
+            
+            task.assigned_to = new_assignee
+            self.reports.task_reassigned(task, email)
+            changed.append((owner_email, project, task))
+        return changed
+    
+    def remove_user(self, email):
+        if self._users is not None:
+            self._users.pop(email, None)
+        else:
+            self._single_users.pop(email, None)
+            self._deleted_emails.add(email)
     
     #Project Commands
     def add_project(self, args):
         # Find the user
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
@@ -76,7 +258,9 @@ class ProjectManagerCLI:
                 owner_email=user.email
             )
             user.add_project(project)
-            self.save_data()
+            self.reports.project_added(user.email, project)
+            if not self.save_data():
+                return
             
             print(f"\n✓ Project created successfully for {user.name}!")
             print(project)
@@ -85,7 +269,7 @@ class ProjectManagerCLI:
             print(f"Error: {e}")
     
     def list_projects(self, args):
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
@@ -95,32 +279,56 @@ class ProjectManagerCLI:
             title=f"Projects for {user.name}",
             empty_message="No projects found"
         )
+        
+        if args.include_archived:
+            display_list(
+                self.data_manager.archive.archived_projects(user.email),
+                title=f"Archived projects for {user.name}",
+                empty_message="No archived projects found"
+            )
     
     def delete_project(self, args):
-        user = self.data_manager.find_user_by_email(self.users, args.email)
-        if not user:
-            print(f"Error: User with email {args.email} not found!")
+        found = self.find_project_to_delete(args)
+        if not found:
             return
         
-        project = user.get_project(args.project_id)
-        if not project:
-            print(f"Error: Project with ID {args.project_id} not found!")
-            return
-        
-        # Confirm deletion
-        if not confirm_action(f"Delete project '{project.title}'?"):
+        # Confirm deletion before taking the writer lock (see delete_user)
+        if not confirm_action(f"Delete project '{found[1].title}'?"):
             print("Cancelled.")
             return
         
-        user.remove_project(args.project_id)
-        self.save_data()
+        with self.data_manager.write_lock():
+            self.reload()
+            found = self.find_project_to_delete(args)
+            if not found:
+                return
+            user, project = found
+            
+            # Its archived tasks go too
+            removed = self.data_manager.archive.remove_project(user.email, project.project_id)
+            self.reports.project_removed(user.email, project, removed)
+            user.remove_project(args.project_id)
+            if not self.save_data():
+                return
         print(f"✓ Project '{project.title}' deleted successfully!")
     
+    def find_project_to_delete(self, args):
+        user = self.find_user(args.email)
+        if not user:
+            print(f"Error: User with email {args.email} not found!")
+            return None
+        
+        project = user.get_project(args.project_id)
+        if not project:
+            print(f"Error: Project with ID {args.project_id} not found!")
+            return None
+        return user, project
+    
 #Task Commands
     
     def add_task(self, args):
         # Find the user and project
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
@@ -132,8 +340,7 @@ class ProjectManagerCLI:
         
         # Validate assigned_to email if provided
         if args.assigned_to:
-            assignee = self.data_manager.find_user_by_email(self.users, args.assigned_to)
-            if not assignee:
+            if not self.user_exists(args.assigned_to):
                 print(f"Warning: User {args.assigned_to} not found, but task will be created anyway.")
         
         try:
@@ -143,7 +350,9 @@ class ProjectManagerCLI:
                 assigned_to=args.assigned_to
             )
             project.add_task(task)
-            self.save_data()
+            self.reports.task_added(user.email, project, task)
+            if not self.save_data():
+                return
             
             print(f"\n✓ Task added to project '{project.title}'!")
             print(task)
@@ -153,29 +362,34 @@ class ProjectManagerCLI:
     
     def list_tasks(self, args):
         # Find the user and project
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
         
         project = user.get_project(args.project_id)
+        if not project and args.include_archived:
+            project = self.data_manager.archive.find_project(user.email, args.project_id)
         if not project:
             print(f"Error: Project with ID {args.project_id} not found!")
             return
         
+        tasks = list(project.tasks)
+        if args.include_archived and user.get_project(args.project_id):
+            tasks.extend(self.data_manager.archive.archived_tasks(user.email, args.project_id))
+        
         # Filter by status if provided
         if args.status:
-            tasks = project.get_tasks_by_status(args.status)
+            tasks = [task for task in tasks if task.status == args.status]
             title = f"Tasks in '{project.title}' with status '{args.status}'"
         else:
-            tasks = project.tasks
             title = f"All Tasks in '{project.title}'"
         
         display_list(tasks, title=title, empty_message="No tasks found")
     
     def complete_task(self, args):
         # Find the user and project
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
@@ -191,13 +405,16 @@ class ProjectManagerCLI:
             return
         
         # Mark as completed
+        old_status = task.status
         task.complete()
-        self.save_data()
+        self.reports.task_status_changed(user.email, project, task, old_status)
+        if not self.save_data():
+            return
         print(f"✓ Task '{task.title}' marked as completed!")
     
     def update_task_status(self, args):
         # Find the user and project
-        user = self.data_manager.find_user_by_email(self.users, args.email)
+        user = self.find_user(args.email)
         if not user:
             print(f"Error: User with email {args.email} not found!")
             return
@@ -213,17 +430,131 @@ class ProjectManagerCLI:
             return
         
         try:
+            old_status = task.status
             task.status = args.status
-            self.save_data()
+            self.reports.task_status_changed(user.email, project, task, old_status)
+            if not self.save_data():
+                return
             print(f"✓ Task '{task.title}' status updated to '{args.status}'!")
         except ValueError as e:
             print(f"Error: {e}")
+    
+    #Query Commands
+    
+    def query(self, args):
+        try:
+            query = Query.parse(args.expression, kind=args.type)
+            engine = QueryEngine(self.data_manager)
+            order_by = args.order_by
+            if order_by and args.desc:
+                order_by = '-' + order_by
+            rows = engine.run(
+                query,
+                order_by=order_by,
+                limit=args.limit,
+                include_archived=args.include_archived
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        
+        if args.explain:
+            print_header("Query plan")
+            for step in engine.plan:
+                print(f"  {step}")
+            print()
+        
+        display_list(
+            [format_row(row, args.type) for row in rows],
+            title=f"Matching {args.type} ({len(rows)})",
+            empty_message=f"No {args.type} found"
+        )
+    
+    #Report Commands
+    
+    def report(self, args):
+        reports = self.reports
+        
+        if args.rebuild or reports.stale:
+            # Rebuilding writes reports.json, so it must describe the newest data
+            with self.data_manager.write_lock():
+                self.reload()
+                reports = self.reports
+                if reports.stale and not args.rebuild:
+                    print("Stored aggregates are out of date; rebuilding...")
+                if args.rebuild or reports.stale:
+                    differences = reports.rebuild(self.users, self.data_manager.archive.load_entries())
+                    reports.save(self.data_manager.users_file)
+                else:
+                    differences = []
+            
+            if args.rebuild:
+                if differences:
+                    print(f"Rebuilt aggregates; {len(differences)} difference(s) found:")
+                    for difference in differences:
+                        print(f"  {difference}")
+                else:
+                    print("✓ Rebuilt aggregates match the stored ones.")
+        
+        if args.by == 'owner':
+            emails = [args.email] if args.email else sorted(reports.owners)
+            lines = []
+            for email in emails:
+                summary = reports.owner_summary(email)
+                if summary:
+                    lines.append(
+                        f"{email}: {summary['projects']} project(s), "
+                        f"{summary['overdue_projects']} overdue | "
+                        f"pending {summary['pending']}, in progress {summary['in_progress']}, "
+                        f"completed {summary['completed']} | {summary['completion']:.0%} complete"
+                    )
+            title = "Workload by project owner"
+        else:
+            emails = [args.email] if args.email else sorted(reports.assignees)
+            lines = []
+            for email in emails:
+                summary = reports.assignee_summary(email)
+                if summary:
+                    lines.append(
+                        f"{email}: pending {summary['pending']}, "
+                        f"in progress {summary['in_progress']}, completed {summary['completed']} | "
+                        f"{summary['completion']:.0%} complete"
+                    )
+            title = "Workload by assignee"
+        
+        display_list(lines, title=title, empty_message="Nothing to report")
+    
+    #Completion Commands
+    
+    def completion(self, args):
+        print(bash_script(), end='')
+    
+    #Archive Commands
+    
+    def archive(self, args):
+        if args.email:
+            user = self.find_user(args.email)
+            if not user:
+                print(f"Error: User with email {args.email} not found!")
+                return
+            users = [user]
+        else:
+            users = self.users
+        
+        # Archive everything that is done, regardless of the automatic thresholds
+        policy = ArchivePolicy(completed_task_threshold=1, project_grace_days=args.grace_days)
+        task_count, project_count = self.data_manager.archive.archive_users(users, policy)
+        
+        if not task_count and not project_count:
+            print("Nothing to archive.")
+            return
+        
+        if not self.save_data():
+            return
+        print(f"✓ Archived {task_count} completed task(s) and {project_count} closed project(s)!")
 
 
 def main():
-    # Create the CLI application instance
-    cli = ProjectManagerCLI()
-    
     # Create main parser
     parser = argparse.ArgumentParser(
         description='Project Manager CLI - Manage users, projects, and tasks',
@@ -241,9 +572,25 @@ Examples:
   
   # Complete a task
   python main.py complete-task john@example.com 1 1
+  
+  # Find in-progress tasks assigned to someone, due before a date
+  python main.py query "status=in_progress and assignee=jane@example.com and due<2025-01-01" --explain
+  
+  # Profile a command (or set PM_PROFILE=1)
+  python main.py --profile list-users
         """
     )
     
+    # Global profiling options
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-phase timing and memory to the metrics file')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help='Also run cProfile around the command')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Also trace peak memory per phase with tracemalloc')
+    parser.add_argument('--metrics-file',
+                        help='JSON lines file for profiling results (default: data/metrics.jsonl)')
+    
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
@@ -258,6 +605,8 @@ Examples:
     # delete-user command
     parser_delete_user = subparsers.add_parser('delete-user', help='Delete a user')
     parser_delete_user.add_argument('email', help='Email of user to delete')
+    parser_delete_user.add_argument('--reassign-to', metavar='EMAIL',
+                                    help='Give their assigned tasks to this user instead of unassigning them')
     
     # ==================== PROJECT COMMANDS ====================
     
@@ -271,6 +620,8 @@ Examples:
     # list-projects command
     parser_list_projects = subparsers.add_parser('list-projects', help='List projects for a user')
     parser_list_projects.add_argument('email', help='User email address')
+    parser_list_projects.add_argument('--include-archived', action='store_true',
+                                      help='Also show archived projects')
     
     # delete-project command
     parser_delete_project = subparsers.add_parser('delete-project', help='Delete a project')
@@ -291,6 +642,8 @@ Examples:
     parser_list_tasks.add_argument('project_id', type=int, help='Project ID')
     parser_list_tasks.add_argument('--status', choices=['pending', 'in_progress', 'completed'],
                                    help='Filter by status')
+    parser_list_tasks.add_argument('--include-archived', action='store_true',
+                                   help='Also show archived tasks')
     
     # complete-task command
     parser_complete_task = subparsers.add_parser('complete-task', help='Mark task as completed')
@@ -306,6 +659,38 @@ Examples:
     parser_update_status.add_argument('status', choices=['pending', 'in_progress', 'completed'],
                                      help='New status')
     
+    # query command
+    parser_query = subparsers.add_parser('query', help='Search tasks or projects across all users')
+    parser_query.add_argument('expression', nargs='?', default='',
+                              help='Conditions joined by "and", e.g. "status=in_progress and due<2025-01-01"')
+    parser_query.add_argument('--type', choices=['tasks', 'projects'], default='tasks',
+                              help='What to search (default: tasks)')
+    parser_query.add_argument('--order-by', help='Field to sort by')
+    parser_query.add_argument('--desc', action='store_true', help='Sort in descending order')
+    parser_query.add_argument('--limit', type=int, help='Maximum number of results')
+    parser_query.add_argument('--include-archived', action='store_true',
+                              help='Also search archived tasks and projects')
+    parser_query.add_argument('--explain', action='store_true',
+                              help='Show which indexes were used')
+    
+    # report command
+    parser_report = subparsers.add_parser('report', help='Show workload and progress summaries')
+    parser_report.add_argument('--by', choices=['owner', 'assignee'], default='owner',
+                               help='Group by project owner or by assignee (default: owner)')
+    parser_report.add_argument('--email', help='Only report on this user')
+    parser_report.add_argument('--rebuild', action='store_true',
+                               help='Recompute the aggregates from the data and verify them')
+    
+    # archive command
+    parser_archive = subparsers.add_parser('archive', help='Move completed tasks and closed projects to the archive')
+    parser_archive.add_argument('--email', help='Only archive this user\'s projects')
+    parser_archive.add_argument('--grace-days', type=int, default=0,
+                                help='Only archive closed projects this many days past due (default: 0)')
+    
+    # completion command
+    parser_completion = subparsers.add_parser('completion', help='Print the shell completion script')
+    parser_completion.add_argument('shell', choices=['bash'], help='Shell to generate completion for')
+    
     # Parse arguments
     args = parser.parse_args()
     
@@ -314,6 +699,18 @@ Examples:
         parser.print_help()
         return
     
+    profiler = Profiler.from_settings(
+        flag=args.profile,
+        use_cprofile=args.profile_cprofile,
+        trace_memory=args.profile_memory,
+        metrics_file=args.metrics_file,
+        started=_IMPORT_WALL_START
+    )
+    profiler.record('import', _IMPORT_WALL, _IMPORT_CPU)
+    
+    # Create the CLI application instance
+    cli = ProjectManagerCLI(profiler=profiler)
+    
     # Execute the appropriate command
     command_map = {
         'add-user': cli.add_user,
@@ -326,11 +723,22 @@ Examples:
         'list-tasks': cli.list_tasks,
         'complete-task': cli.complete_task,
         'update-task-status': cli.update_task_status,
+        'query': cli.query,
+        'report': cli.report,
+        'archive': cli.archive,
+        'completion': cli.completion,
     }
     
     # Run the command
     if args.command in command_map:
-        command_map[args.command](args)
+        if args.command in WRITE_COMMANDS:
+            # Another command can't publish a newer generation between our read and save
+            with cli.data_manager.write_lock():
+                profiler.profile_call('command', command_map[args.command], args)
+        else:
+            profiler.profile_call('command', command_map[args.command], args)
+        profiler.write_metrics(args.command)
+        profiler.print_summary()
     else:
         parser.print_help()
 
@@ -0,0 +1,52 @@
+class LazyCollection:
+    # Holds the raw dicts of child objects (projects or tasks) and only
+    # builds the objects the first time they are needed. Built objects are
+    # kept by ID so lookups and removals don't scan the whole collection.
+
+    def __init__(self, factory, key, raw=None):
+        self._factory = factory
+        self._key = key
+        self._raw = raw
+        self._items = {} if raw is None else None
+
+    @property
+    def materialized(self):
+        return self._items is not None
+
+    def _materialize(self):
+        if self._items is None:
+            self._items = {}
+            for data in self._raw:
+                item = self._factory(data)
+                self._items[getattr(item, self._key)] = item
+            self._raw = None
+        return self._items
+
+    def items(self):
+        return list(self._materialize().values())
+
+    def get(self, key):
+        return self._materialize().get(key)
+
+    def add(self, item):
+        self._materialize()[getattr(item, self._key)] = item
+
+    def remove(self, key):
+        return self._materialize().pop(key, None) is not None
+
+    def count_where(self, field, value):
+        # Count without building objects if they haven't been built yet
+        if self._items is None:
+            return sum(1 for data in self._raw if data.get(field) == value)
+        return sum(1 for item in self._items.values() if getattr(item, field) == value)
+
+    def to_dicts(self):
+        # Untouched children are written back exactly as they were read
+        if self._items is None:
+            return self._raw
+        return [item.to_dict() for item in self._items.values()]
+
+    def __len__(self):
+        if self._items is None:
+            return len(self._raw)
+        return len(self._items)
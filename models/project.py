@@ -1,4 +1,5 @@
 from datetime import datetime
+from models.lazy import LazyCollection
 from models.task import Task
 
 
@@ -21,7 +22,7 @@ class Project:
         self._description = description
         self._due_date = due_date
         self._owner_email = owner_email
-        self._tasks = []  
+        self._tasks = LazyCollection(Task.from_dict, 'task_id')
     
     @property
     def project_id(self):
@@ -63,28 +64,35 @@ class Project:
     
     @property
     def tasks(self):
-        return self._tasks
+        return self._tasks.items()
+    
+    @property
+    def task_count(self):
+        # Doesn't build the Task objects
+        return len(self._tasks)
     
     def add_task(self, task):
         if not isinstance(task, Task):
             raise TypeError("Can only add Task objects")
-        self._tasks.append(task)
+        self._tasks.add(task)
     
     def remove_task(self, task_id):
-        for i, task in enumerate(self._tasks):
-            if task.task_id == task_id:
-                self._tasks.pop(i)
-                return True
-        return False
+        return self._tasks.remove(task_id)
     
     def get_task(self, task_id):
-        for task in self._tasks:
-            if task.task_id == task_id:
-                return task
-        return None
+        return self._tasks.get(task_id)
     
     def get_tasks_by_status(self, status):
-        return [task for task in self._tasks if task.status == status]
+        return [task for task in self.tasks if task.status == status]
+    
+    def count_tasks_by_status(self, status):
+        # Doesn't build the Task objects
+        return self._tasks.count_where('status', status)
+    
+    def is_closed(self):
+        # A project is closed once it has tasks and all of them are done
+        task_count = self.task_count
+        return task_count > 0 and self.count_tasks_by_status('completed') == task_count
     
     def to_dict(self):
         return {
@@ -93,7 +101,7 @@ class Project:
             'description': self.description,
             'due_date': self.due_date,
             'owner_email': self.owner_email,
-            'tasks': [task.to_dict() for task in self.tasks]
+            'tasks': self._tasks.to_dicts()
         }
     
     @classmethod
@@ -106,20 +114,28 @@ class Project:
             project_id=data['project_id']
         )
         
-        # Add tasks
-        for task_data in data.get('tasks', []):
-            task = Task.from_dict(task_data)
-            project.add_task(task)
+        # Tasks are only built when first used, but their IDs must still be reserved
+        tasks_data = data.get('tasks', [])
+        project._tasks = LazyCollection(Task.from_dict, 'task_id', tasks_data)
+        Task.reserve_ids(tasks_data)
         
         return project
     
+    @classmethod
+    def reserve_ids(cls, projects_data):
+        # Keep the ID counters ahead of projects (and their tasks) that haven't been built
+        for data in projects_data:
+            if data['project_id'] >= cls._next_id:
+                cls._next_id = data['project_id'] + 1
+            Task.reserve_ids(data.get('tasks', []))
+    
     def __str__(self):
-        task_count = len(self.tasks)
-        completed = len(self.get_tasks_by_status('completed'))
+        task_count = self.task_count
+        completed = self.count_tasks_by_status('completed')
         return (f"[{self.project_id}] {self.title}\n"
                 f"    Description: {self.description}\n"
                 f"    Due: {self.due_date}\n"
                 f"    Tasks: {completed}/{task_count} completed")
     
     def __repr__(self):
-        return f"Project(id={self.project_id}, title='{self.title}', tasks={len(self.tasks)})"
+        return f"Project(id={self.project_id}, title='{self.title}', tasks={self.task_count})"
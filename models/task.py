@@ -50,6 +50,13 @@ class Task:
     def assigned_to(self, value):
         self._assigned_to = value
     
+    @classmethod
+    def reserve_ids(cls, tasks_data):
+        # Keep the ID counter ahead of tasks that haven't been built yet
+        for data in tasks_data:
+            if data['task_id'] >= cls._next_id:
+                cls._next_id = data['task_id'] + 1
+    
     def complete(self):
         self.status = 'completed'
     
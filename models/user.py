@@ -1,4 +1,5 @@
 import re
+from models.lazy import LazyCollection
 from models.project import Project
 
 
@@ -19,7 +20,7 @@ class User:
         
         self._name = name
         self._email = email
-        self._projects = []  
+        self._projects = LazyCollection(Project.from_dict, 'project_id')
     
     @property
     def user_id(self):
@@ -48,51 +49,51 @@ class User:
     
     @property
     def projects(self):
-        return self._projects
+        return self._projects.items()
+    
+    @property
+    def project_count(self):
+        # Doesn't build the Project objects
+        return len(self._projects)
     
     def add_project(self, project):
         if not isinstance(project, Project):
             raise TypeError("Can only add Project objects")
-        self._projects.append(project)
+        self._projects.add(project)
     
     def remove_project(self, project_id):
-        for i, project in enumerate(self._projects):
-            if project.project_id == project_id:
-                self._projects.pop(i)
-                return True
-        return False
+        return self._projects.remove(project_id)
     
     def get_project(self, project_id):
-        for project in self._projects:
-            if project.project_id == project_id:
-                return project
-        return None
+        return self._projects.get(project_id)
     
     def to_dict(self):
         return {
             'user_id': self.user_id,
             'name': self.name,
             'email': self.email,
-            'projects': [project.to_dict() for project in self.projects]
+            'projects': self._projects.to_dicts()
         }
     
     @classmethod
-    def from_dict(cls, data):
+    def from_dict(cls, data, reserve_ids=True):
         user = cls(
             name=data['name'],
             email=data['email'],
             user_id=data['user_id']
         )
         
-        # Add projects
-        for project_data in data.get('projects', []):
-            project = Project.from_dict(project_data)
-            user.add_project(project)
+        # Projects are only built when first used, but their IDs must still be reserved
+        # (skip that when the caller restores the ID counters some other way)
+        projects_data = data.get('projects', [])
+        user._projects = LazyCollection(Project.from_dict, 'project_id', projects_data)
+        if reserve_ids:
+            Project.reserve_ids(projects_data)
         
         return user
     
     def __str__(self):
-        project_count = len(self.projects)
+        project_count = self.project_count
         return f"[{self.user_id}] {self.name} ({self.email}) - {project_count} project(s)"
     
     def __repr__(self):
@@ -0,0 +1,86 @@
+import argparse
+
+import pytest
+
+from models import User, Project, Task
+from utils.archive import ArchiveManager
+from utils.data_manager import DataManager
+from utils.reports import ReportStore
+
+
+@pytest.fixture
+def cli(tmp_path, monkeypatch):
+    """
+    Ann owns a project with archived and live tasks, some assigned to Bob;
+    Bob owns a project with an archived task.
+    """
+    from main import ProjectManagerCLI
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PM_AUTO_ARCHIVE', '0')
+    monkeypatch.setattr('main.confirm_action', lambda prompt: True)
+
+    ann, bob = User('Ann', 'ann@x.com'), User('Bob', 'bob@x.com')
+    for owner, assignee in ((ann, 'bob@x.com'), (bob, None)):
+        project = Project(f"{owner.name}'s", "desc", "2030-01-01", owner.email)
+        for status in ('completed', 'completed', 'pending'):
+            project.add_task(Task("t", status=status, assigned_to=assignee))
+        owner.add_project(project)
+    DataManager('data', compression='none').save_users([ann, bob])
+
+    ProjectManagerCLI().archive(argparse.Namespace(email=None, grace_days=0))
+    reports = ReportStore('data')
+    data = DataManager('data', compression='none')
+    reports.rebuild(data.load_users(), data.archive.load_entries())
+    reports.save(data.users_file)
+    return ProjectManagerCLI()
+
+
+def assert_reports_match():
+    data = DataManager('data', compression='none')
+    reports = ReportStore('data')
+    reports.load(data.users_file)
+    assert not reports.stale
+    assert reports.rebuild(data.load_users(), data.archive.load_entries()) == []
+
+
+def test_remove_owner_writes_nothing_until_commit(cli):
+    archive = ArchiveManager('data')
+    before = archive.load_entries()
+
+    removed, reassigned = archive.remove_owner('bob@x.com')
+    assert [entry['owner_email'] for entry in removed] == ['bob@x.com'] * 2
+    assert len(reassigned) == 2
+    assert ArchiveManager('data').load_entries() == before
+
+    archive.discard()
+    archive.commit()
+    assert ArchiveManager('data').load_entries() == before
+
+
+def test_delete_user_updates_the_archive_after_saving(cli):
+    cli.delete_user(argparse.Namespace(email='bob@x.com', reassign_to=None))
+
+    entries = ArchiveManager('data').load_entries()
+    assert {entry['owner_email'] for entry in entries} == {'ann@x.com'}
+    assert all(entry['data']['assigned_to'] is None for entry in entries)
+    assert_reports_match()
+
+
+def test_failed_save_leaves_the_archive_alone(cli, monkeypatch):
+    before = ArchiveManager('data').load_entries()
+    monkeypatch.setattr(cli.data_manager, 'save_changes', lambda users, deleted_emails=(): False)
+
+    cli.delete_user(argparse.Namespace(email='bob@x.com', reassign_to=None))
+
+    assert ArchiveManager('data').load_entries() == before
+    assert DataManager('data', compression='none').user_exists('bob@x.com')
+
+
+def test_delete_project_drops_its_archived_tasks(cli):
+    project_id = DataManager('data', compression='none').load_user('ann@x.com').projects[0].project_id
+
+    cli.delete_project(argparse.Namespace(email='ann@x.com', project_id=project_id))
+
+    entries = ArchiveManager('data').load_entries()
+    assert {entry['owner_email'] for entry in entries} == {'bob@x.com'}
+    assert_reports_match()
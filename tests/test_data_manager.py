@@ -0,0 +1,171 @@
+import json
+import os
+
+from models import User, Project, Task
+from utils.data_manager import DataManager
+
+
+def make_user(name, email, projects=0, tasks=0, status='pending'):
+    user = User(name, email)
+    for p in range(projects):
+        project = Project(f"{name} project {p}", "desc", "2030-01-01", email)
+        for t in range(tasks):
+            project.add_task(Task(f"task {t}", status=status))
+        user.add_project(project)
+    return user
+
+
+def read_json(manager):
+    with open(manager.users_file) as f:
+        return [data for data in json.load(f) if data is not None]
+
+
+def test_offset_index_spans_decode_single_records(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com', 2, 3), make_user('Bob', 'bob@x.com', 1, 1)])
+
+    with open(manager.index_file) as f:
+        index = json.load(f)
+    with open(manager.users_file, 'rb') as f:
+        raw = f.read()
+    for email, (start, end) in index['records'].items():
+        assert json.loads(raw[start:end])['email'] == email
+
+    bob = DataManager(str(tmp_path), compression='none').load_user('bob@x.com')
+    assert bob.name == 'Bob'
+    assert bob.project_count == 1
+    assert manager.user_exists('ann@x.com')
+    assert not manager.user_exists('nobody@x.com')
+
+
+def test_save_user_rewrites_in_place_when_record_fits(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    # "in_progress" -> "completed" makes the record shorter
+    manager.save_users([make_user('Ann', 'ann@x.com', 1, 2, 'in_progress'), make_user('Bob', 'bob@x.com')])
+    size = os.path.getsize(manager.users_file)
+    span = json.load(open(manager.index_file))['records']['ann@x.com']
+
+    ann = manager.load_user('ann@x.com')
+    ann.projects[0].tasks[0].complete()
+    assert manager.save_user(ann)
+
+    index = json.load(open(manager.index_file))
+    assert os.path.getsize(manager.users_file) == size
+    assert index['records']['ann@x.com'] == span
+    assert index['wasted'] == 0
+
+    reloaded = DataManager(str(tmp_path), compression='none').load_user('ann@x.com')
+    assert reloaded.projects[0].tasks[0].status == 'completed'
+
+
+def test_save_user_appends_when_record_grows(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com'), make_user('Bob', 'bob@x.com')])
+    old_span = json.load(open(manager.index_file))['records']['ann@x.com']
+
+    ann = manager.load_user('ann@x.com')
+    ann.add_project(Project("New", "grown", "2030-01-01", 'ann@x.com'))
+    assert manager.save_user(ann)
+
+    index = json.load(open(manager.index_file))
+    assert index['records']['ann@x.com'][0] > old_span[0]
+    assert index['wasted'] > 0
+    with open(manager.users_file) as f:
+        assert None in json.load(f)
+
+    users = {u.email: u for u in DataManager(str(tmp_path), compression='none').load_users()}
+    assert sorted(users) == ['ann@x.com', 'bob@x.com']
+    assert users['ann@x.com'].project_count == 1
+
+
+def test_new_user_gets_unused_id_without_full_load(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com'), make_user('Bob', 'bob@x.com')])
+    User._next_id = 1
+
+    other = DataManager(str(tmp_path), compression='none')
+    other.sync_next_ids()
+    carl = User('Carl', 'carl@x.com')
+    assert other.save_user(carl)
+
+    ids = [data['user_id'] for data in read_json(other)]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_delete_user_leaves_null_slot(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com'), make_user('Bob', 'bob@x.com')])
+
+    assert manager.delete_user('ann@x.com')
+    assert not manager.user_exists('ann@x.com')
+    assert [data['email'] for data in read_json(manager)] == ['bob@x.com']
+
+
+def test_mostly_dead_file_is_compacted(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com')])
+
+    wasted = []
+    for i in range(6):
+        ann = manager.load_user('ann@x.com')
+        ann.add_project(Project(f"P{i}", "x" * 200, "2030-01-01", 'ann@x.com'))
+        assert manager.save_user(ann)
+        wasted.append(json.load(open(manager.index_file))['wasted'])
+
+    # Each append leaves a dead slot until one save finds over half the file dead and rewrites it
+    assert wasted[0] > 0
+    assert 0 in wasted[1:]
+    assert manager.load_user('ann@x.com').project_count == 6
+
+
+def test_stale_index_falls_back_to_full_load(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com', 1, 1)])
+    os.remove(manager.index_file)
+
+    other = DataManager(str(tmp_path), compression='none')
+    assert not other.has_offset_index()
+    assert other.load_user('ann@x.com').name == 'Ann'
+    # The full load rebuilt the index
+    assert other.has_offset_index()
+
+
+def test_cache_holds_plain_data_only(tmp_path):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com', 1, 2)])
+    with open(manager.cache_file, 'rb') as f:
+        # Pickle protocol 2+ starts with the PROTO opcode
+        assert f.read(1) != b'\x80'
+
+    users = DataManager(str(tmp_path), compression='none')._read_cache()
+    assert [u.email for u in users] == ['ann@x.com']
+    assert users[0].projects[0].task_count == 2
+
+
+def test_compressed_round_trip(tmp_path):
+    manager = DataManager(str(tmp_path), compression='gzip')
+    manager.save_users([make_user('Ann', 'ann@x.com', 1, 2)])
+    assert manager.users_file.endswith('.gz')
+
+    ann = DataManager(str(tmp_path), compression='gzip', use_cache=False).load_user('ann@x.com')
+    ann.projects[0].tasks[1].complete()
+    reader = DataManager(str(tmp_path), compression='gzip', use_cache=False)
+    # No offset index for compressed files: saving falls back to a full rewrite
+    assert reader.save_user(ann)
+    reloaded = DataManager(str(tmp_path), compression='gzip', use_cache=False).load_user('ann@x.com')
+    assert reloaded.projects[0].count_tasks_by_status('completed') == 1
+
+
+def test_cached_load_uses_stored_id_counters(tmp_path, monkeypatch):
+    manager = DataManager(str(tmp_path), compression='none')
+    manager.save_users([make_user('Ann', 'ann@x.com', 2, 3)])
+    Project._next_id = Task._next_id = 1
+
+    def walk(cls, data):
+        raise AssertionError("walked every project to reserve IDs")
+    monkeypatch.setattr(Project, 'reserve_ids', classmethod(walk))
+
+    users = DataManager(str(tmp_path), compression='none').load_users()
+    assert users[0].project_count == 2
+    assert Project("new", "d", "2030-01-01", 'ann@x.com').project_id > max(
+        p.project_id for p in users[0].projects)
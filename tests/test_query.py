@@ -0,0 +1,58 @@
+import pytest
+
+from models import User, Project, Task
+from utils.data_manager import DataManager
+from utils.query import Query, QueryEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    users = []
+    for name, due_dates in (('Ann', ['2030-01-01', '2030-02-01']), ('Bob', ['2030-02-01', '2030-03-01'])):
+        user = User(name, f"{name.lower()}@x.com")
+        for due in due_dates:
+            project = Project(f"{name} {due}", "desc", due, user.email)
+            project.add_task(Task("research and design", assigned_to='ann@x.com'))
+            project.add_task(Task("build"))
+            user.add_project(project)
+        users.append(user)
+    data_manager = DataManager(str(tmp_path / 'data'), compression='none')
+    data_manager.save_users(users)
+    return QueryEngine(DataManager(str(tmp_path / 'data'), compression='none'))
+
+
+def test_quoted_and_is_part_of_the_value():
+    query = Query.parse("title='research and design' and status=pending")
+    assert [str(c) for c in query.conditions] == ['title=research and design', 'status=pending']
+
+
+def test_none_matches_missing_values_only_with_equality():
+    assert Query.parse('assignee=none').conditions[0].value is None
+    assert Query.parse("assignee='none'").conditions[0].value == 'none'
+    for expression in ('due<none', 'title~none'):
+        with pytest.raises(ValueError):
+            Query.parse(expression)
+
+
+def test_unassigned_tasks(engine):
+    rows = engine.run(Query.parse('assignee=none'))
+    assert len(rows) == 4
+    assert {row['title'] for row in rows} == {'build'}
+
+
+def test_due_range_uses_the_index(engine):
+    query = Query.parse('due>=2030-01-15 and due<2030-03-01', kind='projects')
+    rows = engine.run(query)
+
+    assert sorted(row['owner'] for row in rows) == ['ann@x.com', 'bob@x.com']
+    assert {row['due'] for row in rows} == {'2030-02-01'}
+    assert engine.plan[0].startswith('index lookup on due>=2030-01-15 and due<2030-03-01: 2 posting(s)')
+
+    # Inclusive and exclusive bounds at an existing date
+    assert len(engine.run(Query.parse('due<=2030-02-01', kind='projects'))) == 3
+    assert engine.run(Query.parse('due>2030-03-01', kind='projects')) == []
+
+
+def test_negative_limit_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.run(Query.parse(''), limit=-1)
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def test_incremental_updates_match_a_rebuild(tmp_path):
+    env = dict(os.environ, PM_AUTO_ARCHIVE='0', PM_COMPRESSION='none')
+    env.pop('PM_PROFILE', None)
+
+    def run(*args, answer=''):
+        result = subprocess.run([sys.executable, MAIN, *args], cwd=tmp_path, env=env,
+                                input=answer, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert 'Error' not in result.stdout, result.stdout
+        return result.stdout
+
+    commands = [
+        ('add-user', 'Ann', 'ann@x.com'),
+        ('add-user', 'Bob', 'bob@x.com'),
+        ('add-user', 'Cat', 'cat@x.com'),
+        ('add-project', 'ann@x.com', 'P1', 'd', '2020-01-01'),
+        ('add-project', 'bob@x.com', 'P2', 'd', '2030-01-01'),
+        ('add-project', 'cat@x.com', 'P3', 'd', '2030-01-01'),
+        ('add-task', 'ann@x.com', '1', 't1', '--assigned-to', 'bob@x.com'),
+        ('add-task', 'ann@x.com', '1', 't2', '--assigned-to', 'cat@x.com'),
+        ('add-task', 'bob@x.com', '2', 't3', '--assigned-to', 'ann@x.com'),
+        ('add-task', 'cat@x.com', '3', 't4', '--assigned-to', 'bob@x.com'),
+        ('add-task', 'cat@x.com', '3', 't5'),
+        ('complete-task', 'ann@x.com', '1', '1'),
+        ('update-task-status', 'bob@x.com', '2', '3', 'in_progress'),
+        ('complete-task', 'cat@x.com', '3', '5'),
+        ('archive',),
+    ]
+    for args in commands:
+        run(*args)
+    run('delete-project', 'cat@x.com', '3', answer='y\n')
+    run('delete-user', 'bob@x.com', '--reassign-to', 'cat@x.com', answer='y\n')
+
+    before = run('report', '--by', 'assignee')
+    assert 'match the stored ones' in run('report', '--rebuild')
+    assert run('report', '--by', 'assignee') == before
+    assert 'ann@x.com: 1 project(s), 1 overdue' in run('report')
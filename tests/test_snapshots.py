@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+
+from models import User, Project, Task
+from utils.data_manager import DataManager
+from utils.snapshots import SnapshotStore
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def manager(tmp_path):
+    return DataManager(str(tmp_path / 'data'), compression='none')
+
+
+def add_project(data_manager, email, title):
+    user = data_manager.load_user(email)
+    data_manager.sync_next_ids()
+    user.add_project(Project(title, "desc", "2030-01-01", email))
+    return user
+
+
+def test_pinned_reader_keeps_its_generation_until_released(tmp_path):
+    setup = manager(tmp_path)
+    setup.save_users([User('Ann', 'ann@x.com')])
+    # A DataManager holds its lease until the process exits
+    setup.snapshots.release(setup._lease)
+
+    reader = manager(tmp_path)
+    pinned = reader.snapshot_dir
+
+    writer = manager(tmp_path)
+    assert writer.save_user(add_project(writer, 'ann@x.com', 'P1'))
+    assert writer.generation > reader.generation
+
+    # The reader still sees the data as it was, and its snapshot survived garbage collection
+    assert os.path.isdir(pinned)
+    assert reader.load_user('ann@x.com').project_count == 0
+    assert reader.load_users()[0].project_count == 0
+
+    reader.snapshots.release(reader._lease)
+    writer.snapshots.release(writer._lease)
+    writer = manager(tmp_path)
+    assert writer.save_user(add_project(writer, 'ann@x.com', 'P2'))
+    assert not os.path.exists(pinned)
+    assert sorted(name for name in os.listdir(writer.snapshots.snapshot_dir) if name.isdigit()) == [
+        f"{writer.generation:06d}"
+    ]
+
+
+def test_leases_of_dead_processes_are_ignored(tmp_path):
+    data = manager(tmp_path)
+    data.save_users([User('Ann', 'ann@x.com')])
+    old_dir = data.snapshot_dir
+
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                              capture_output=True, text=True)
+    dead_pid = int(finished.stdout)
+    lease = os.path.join(data.snapshots.lease_dir,
+                         f"{data.generation}.{socket.gethostname()}.{dead_pid}.0")
+    open(lease, 'w').close()
+
+    assert data.save_users([User('Ann', 'ann@x.com')])
+    assert not os.path.exists(old_dir)
+    assert not os.path.exists(lease)
+
+
+def test_legacy_layout_is_read_and_migrated(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    legacy = [User('Ann', 'ann@x.com').to_dict()]
+    (data_dir / 'users.json').write_text(json.dumps(legacy, indent=2))
+
+    data = manager(tmp_path)
+    assert data.generation == 0
+    assert [u.email for u in data.load_users()] == ['ann@x.com']
+
+    assert data.save_user(add_project(data, 'ann@x.com', 'P1'))
+    assert data.generation == 1
+    assert not (data_dir / 'users.json').exists()
+    assert not (data_dir / 'users.idx').exists()
+    assert manager(tmp_path).load_user('ann@x.com').project_count == 1
+
+
+def test_failed_save_publishes_nothing(tmp_path):
+    data = manager(tmp_path)
+    data.save_users([User('Ann', 'ann@x.com')])
+    generation = data.generation
+
+    class Broken(User):
+        def to_dict(self):
+            raise RuntimeError("boom")
+
+    assert not data.save_users([Broken('Bob', 'bob@x.com')])
+    assert data.generation == generation
+    assert data.snapshots.current() == generation
+    assert not os.path.exists(data.snapshots.directory(generation + 1))
+    assert [u.email for u in manager(tmp_path).load_users()] == ['ann@x.com']
+
+
+def test_save_on_top_of_a_newer_generation_is_refused(tmp_path):
+    manager(tmp_path).save_users([User('Ann', 'ann@x.com')])
+    first, second = manager(tmp_path), manager(tmp_path)
+
+    assert first.save_user(add_project(first, 'ann@x.com', 'P1'))
+    # second read Ann before first saved; saving its copy would drop P1
+    stale = add_project(second, 'ann@x.com', 'P2')
+    assert not second.save_user(stale)
+    assert not second.save_users([stale])
+    assert not second.delete_user('ann@x.com')
+
+    assert [p.title for p in manager(tmp_path).load_user('ann@x.com').projects] == ['P1']
+
+
+def test_write_lock_reads_the_latest_generation(tmp_path):
+    manager(tmp_path).save_users([User('Ann', 'ann@x.com')])
+    first, second = manager(tmp_path), manager(tmp_path)
+
+    assert first.save_user(add_project(first, 'ann@x.com', 'P1'))
+    with second.write_lock():
+        assert second.save_user(add_project(second, 'ann@x.com', 'P2'))
+
+    titles = [p.title for p in manager(tmp_path).load_user('ann@x.com').projects]
+    assert titles == ['P1', 'P2']
+
+
+def test_concurrent_commands_lose_no_writes(tmp_path):
+    env = dict(os.environ, PM_AUTO_ARCHIVE='0', PM_COMPRESSION='none')
+    env.pop('PM_PROFILE', None)
+
+    def run(*args):
+        return subprocess.Popen([sys.executable, MAIN, *args], cwd=tmp_path, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    for args in (('add-user', 'Ann', 'ann@x.com'), ('add-project', 'ann@x.com', 'P', 'd', '2030-01-01')):
+        assert run(*args).wait() == 0
+
+    script = ('import subprocess, sys\n'
+              'for i in range(5):\n'
+              '    subprocess.run([sys.executable, sys.argv[1], "add-task", "ann@x.com", "1", '
+              'f"{sys.argv[2]}-{i}"], check=True)\n')
+    workers = [subprocess.Popen([sys.executable, '-c', script, MAIN, f"w{w}"], cwd=tmp_path, env=env,
+                                stdout=subprocess.DEVNULL)
+               for w in range(4)]
+    readers = [run('list-users') for _ in range(10)]
+    assert all(worker.wait() == 0 for worker in workers)
+    assert all(reader.wait() == 0 and not reader.stderr.read() for reader in readers)
+
+    project = DataManager(str(tmp_path / 'data'), compression='none').load_user('ann@x.com').projects[0]
+    ids = [task.task_id for task in project.tasks]
+    assert sorted(task.title for task in project.tasks) == sorted(
+        f"w{w}-{i}" for w in range(4) for i in range(5)
+    )
+    assert len(set(ids)) == len(ids)
+
+
+def test_lock_is_reentrant(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    with store.lock():
+        with store.lock():
+            assert store._lock_depth == 2
+        assert store._lock_handle is not None
+    assert store._lock_handle is None
+
+
+def test_save_changes_publishes_one_generation(tmp_path):
+    data = manager(tmp_path)
+    data.save_users([User('Ann', 'ann@x.com'), User('Bob', 'bob@x.com'), User('Cat', 'cat@x.com')])
+    generation = data.generation
+
+    data = manager(tmp_path)
+    # Ann grows (appended), Dan is new (appended), Bob is deleted
+    ann = add_project(data, 'ann@x.com', 'P1')
+    assert data.save_changes([ann, User('Dan', 'dan@x.com')], ['bob@x.com', 'nobody@x.com'])
+    assert data.generation == generation + 1
+
+    reloaded = manager(tmp_path)
+    assert sorted(u.email for u in reloaded.load_users()) == ['ann@x.com', 'cat@x.com', 'dan@x.com']
+    assert reloaded.load_user('ann@x.com').project_count == 1
+    assert reloaded.load_user('dan@x.com').name == 'Dan'
+    assert not reloaded.user_exists('bob@x.com')
+
+
+def test_delete_user_cascade_is_one_generation(tmp_path, monkeypatch):
+    from main import ProjectManagerCLI
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PM_AUTO_ARCHIVE', '0')
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'y')
+
+    users = []
+    for name in ('Ann', 'Bob', 'Cat'):
+        user = User(name, f"{name.lower()}@x.com")
+        if name != 'Bob':
+            project = Project(f"{name}'s", "desc", "2030-01-01", user.email)
+            project.add_task(Task("t", assigned_to='bob@x.com'))
+            user.add_project(project)
+        users.append(user)
+    DataManager('data', compression='none').save_users(users)
+    before = manager(tmp_path).generation
+
+    cli = ProjectManagerCLI()
+    cli.delete_user(argparse.Namespace(email='bob@x.com', reassign_to=None))
+
+    data = manager(tmp_path)
+    assert data.generation == before + 1
+    assert not data.user_exists('bob@x.com')
+    for email in ('ann@x.com', 'cat@x.com'):
+        assert data.load_user(email).projects[0].tasks[0].assigned_to is None
+
+
+def test_delete_confirms_before_locking_and_checks_again(tmp_path, monkeypatch, capsys):
+    import fcntl
+    from main import ProjectManagerCLI
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PM_AUTO_ARCHIVE', '0')
+    DataManager('data', compression='none').save_users([User('Ann', 'ann@x.com')])
+
+    def answer(prompt):
+        monkeypatch.setattr('main.confirm_action', lambda prompt: True)
+        # Nobody holds the writer lock while we wait, so another command can run
+        with open(os.path.join('data', 'snapshots', 'write.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        ProjectManagerCLI().delete_user(argparse.Namespace(email='ann@x.com', reassign_to=None))
+        return True
+
+    monkeypatch.setattr('main.confirm_action', answer)
+    ProjectManagerCLI().delete_user(argparse.Namespace(email='ann@x.com', reassign_to=None))
+
+    out = capsys.readouterr().out
+    assert out.count('deleted successfully') == 1
+    assert 'not found' in out
+    assert not manager(tmp_path).user_exists('ann@x.com')
+
+
+def test_completion_index_follows_the_published_generation(tmp_path):
+    from utils.completion import CompletionIndex
+    data = manager(tmp_path)
+    data.save_users([User('Ann', 'ann@x.com')])
+    completions = CompletionIndex(str(tmp_path / 'data'))
+    assert completions.read(completions.current_generation())['projects'] == {'ann@x.com': []}
+
+    data.save_changes([add_project(data, 'ann@x.com', 'P')])
+    index = completions.read(completions.current_generation())
+    assert len(index['projects']['ann@x.com']) == 1
+
+    # An index left behind by an older generation is not used
+    completions.write(index, data.generation - 1)
+    assert completions.read(completions.current_generation()) is None
+    data.save_changes([add_project(data, 'ann@x.com', 'Q')])
+    assert completions.read(completions.current_generation()) is None
+    assert manager(tmp_path).load_users()
+    assert len(completions.read(completions.current_generation())['projects']['ann@x.com']) == 2
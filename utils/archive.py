@@ -0,0 +1,443 @@
+"""
+Archive Utilities
+Moves completed tasks and closed projects into compressed cold-storage segments
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from models import Project, Task
+
+
+# Environment variable enabling the automatic archive policy (off when unset or "0").
+# "1" uses the defaults; otherwise "THRESHOLD" or "THRESHOLD:GRACE_DAYS", e.g. PM_AUTO_ARCHIVE=50:30
+AUTO_ARCHIVE_ENV_VAR = 'PM_AUTO_ARCHIVE'
+
+
+class ArchivePolicy:
+    """
+    Decides which tasks and projects are cold enough to archive.
+    """
+
+    def __init__(self, completed_task_threshold=50, project_grace_days=30):
+        """
+        Initialize the ArchivePolicy.
+
+        Args:
+            completed_task_threshold (int): Archive a project's completed tasks
+                once it has at least this many of them
+            project_grace_days (int): Archive closed projects this many days
+                after their due date
+        """
+        self.completed_task_threshold = completed_task_threshold
+        self.project_grace_days = project_grace_days
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the automatic policy from the environment.
+
+        Returns:
+            ArchivePolicy or None: The policy, or None if auto-archiving is disabled
+        """
+        value = os.environ.get(AUTO_ARCHIVE_ENV_VAR, '').strip().lower()
+        if value in ('', '0', 'off'):
+            return None
+        if value in ('1', 'on'):
+            return cls()
+
+        try:
+            threshold, _, grace = value.partition(':')
+            return cls(int(threshold), int(grace) if grace else 30)
+        except ValueError:
+            print(f"Warning: ignoring invalid {AUTO_ARCHIVE_ENV_VAR}={value!r}")
+            return cls()
+
+    def should_archive_project(self, project, today):
+        """
+        Check whether a project is closed and far enough past its due date.
+
+        Args:
+            project (Project): Project to check
+            today (date): Current date
+
+        Returns:
+            bool: True if the project should be archived
+        """
+        if not project.is_closed():
+            return False
+        try:
+            due = datetime.strptime(project.due_date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return False
+        return due + timedelta(days=self.project_grace_days) < today
+
+    def tasks_to_archive(self, project):
+        """
+        Get the completed tasks of a project, if there are enough to archive.
+
+        Args:
+            project (Project): Project to check
+
+        Returns:
+            list: Task objects to archive (possibly empty)
+        """
+        # Counting first avoids building the Task objects of small projects
+        if project.count_tasks_by_status('completed') < self.completed_task_threshold:
+            return []
+        return project.get_tasks_by_status('completed')
+
+
+class ArchiveManager:
+    """
+    Stores archived tasks and projects in gzip-compressed JSON segments.
+
+    New entries always go to a new segment; manifest.json lists them along with the owner
+    emails each one contains, so reading one user's archive only opens the
+    segments that mention them.
+
+    Writes go along with a save of the live data, so make them while
+    holding the DataManager's write lock.
+    """
+
+    def __init__(self, data_dir='data'):
+        """
+        Initialize the ArchiveManager.
+
+        Args:
+            data_dir (str): Directory where data files are stored
+        """
+        self.archive_dir = os.path.join(data_dir, 'archive')
+        self.manifest_file = os.path.join(self.archive_dir, 'manifest.json')
+        # Segment file name -> entries it will hold after commit() ([] removes it)
+        self._pending = {}
+
+    def load_manifest(self):
+        """
+        Load the archive manifest.
+
+        Returns:
+            dict: Manifest with 'segments' and 'next_ids'
+        """
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'segments': [], 'next_ids': {}}
+
+    def next_ids(self):
+        """
+        Get the ID counters needed to avoid reusing archived IDs.
+
+        Returns:
+            dict: Class name -> next ID
+        """
+        return self.load_manifest().get('next_ids', {})
+
+    def archive_users(self, users, policy, today=None):
+        """
+        Move cold tasks and projects out of the given users into a new segment.
+
+        The segment is written before the caller saves the users, so a crash
+        in between leaves a duplicate in the archive rather than losing data.
+
+        Args:
+            users (list): User objects to archive from (modified in place)
+            policy (ArchivePolicy): Which tasks and projects to move
+            today (date): Current date (defaults to today)
+
+        Returns:
+            tuple: (number of tasks archived, number of projects archived)
+        """
+        today = today or datetime.now().date()
+        entries = []
+        task_count = project_count = 0
+
+        for user in users:
+            for project in list(user.projects):
+                if policy.should_archive_project(project, today):
+                    entries.append({
+                        'kind': 'project',
+                        'owner_email': user.email,
+                        'data': project.to_dict(),
+                    })
+                    user.remove_project(project.project_id)
+                    project_count += 1
+                    continue
+
+                for task in policy.tasks_to_archive(project):
+                    entries.append({
+                        'kind': 'task',
+                        'owner_email': user.email,
+                        'project_id': project.project_id,
+                        'data': task.to_dict(),
+                    })
+                    project.remove_task(task.task_id)
+                    task_count += 1
+
+        if entries:
+            self._write_segment(entries)
+        return task_count, project_count
+
+    def load_entries(self, owner_email=None):
+        """
+        Load archived entries, optionally only for one owner.
+
+        Args:
+            owner_email (str): Only return entries for this owner
+
+        Returns:
+            list: Archive entry dictionaries
+        """
+        entries = []
+        for segment in self.load_manifest()['segments']:
+            if owner_email is not None and owner_email not in segment['owners']:
+                continue
+            path = os.path.join(self.archive_dir, segment['file'])
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    segment_entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading archive segment {segment['file']}: {e}")
+                continue
+            entries.extend(
+                entry for entry in segment_entries
+                if owner_email is None or entry['owner_email'] == owner_email
+            )
+        return entries
+
+    def archived_projects(self, owner_email):
+        """
+        Get a user's archived projects.
+
+        Args:
+            owner_email (str): Owner email address
+
+        Returns:
+            list: Project objects
+        """
+        return [
+            Project.from_dict(entry['data'])
+            for entry in self.load_entries(owner_email)
+            if entry['kind'] == 'project'
+        ]
+
+    def archived_tasks(self, owner_email, project_id):
+        """
+        Get the archived tasks of one project, including those of an archived project.
+
+        Args:
+            owner_email (str): Owner email address
+            project_id (int): Project ID
+
+        Returns:
+            list: Task objects
+        """
+        tasks = []
+        for entry in self.load_entries(owner_email):
+            if entry['kind'] == 'task' and entry['project_id'] == project_id:
+                tasks.append(Task.from_dict(entry['data']))
+            elif entry['kind'] == 'project' and entry['data']['project_id'] == project_id:
+                tasks.extend(Task.from_dict(data) for data in entry['data'].get('tasks', []))
+        return tasks
+
+    def find_project(self, owner_email, project_id):
+        """
+        Find an archived project.
+
+        Args:
+            owner_email (str): Owner email address
+            project_id (int): Project ID
+
+        Returns:
+            Project or None: The archived project if found, None otherwise
+        """
+        for project in self.archived_projects(owner_email):
+            if project.project_id == project_id:
+                return project
+        return None
+
+    def remove_owner(self, email, new_assignee=None):
+        """
+        Queue the archive side of a user deletion.
+
+        The user's own archived tasks and projects are dropped, and archived
+        tasks of other owners that are assigned to them are unassigned (or
+        given to new_assignee). Nothing is written until commit(), which the
+        caller runs once the live data has been saved.
+
+        Args:
+            email (str): Email of the user being deleted
+            new_assignee (str): Email to reassign their archived tasks to
+
+        Returns:
+            tuple: (list of removed entry dictionaries,
+                    list of (owner_email, project_id, Task) that were reassigned)
+        """
+        removed, reassigned = [], []
+
+        for segment in self.load_manifest()['segments']:
+            entries = self._pending_entries(segment)
+            if entries is None:
+                continue
+
+            kept, changed = [], False
+            for entry in entries:
+                if entry['owner_email'] == email:
+                    removed.append(entry)
+                    changed = True
+                    continue
+
+                if entry['kind'] == 'project':
+                    project_id = entry['data']['project_id']
+                    tasks = entry['data'].get('tasks', [])
+                else:
+                    project_id = entry['project_id']
+                    tasks = [entry['data']]
+                for data in tasks:
+                    if data.get('assigned_to') == email:
+                        data['assigned_to'] = new_assignee
+                        reassigned.append((entry['owner_email'], project_id, Task.from_dict(data)))
+                        changed = True
+                kept.append(entry)
+
+            if changed:
+                self._pending[segment['file']] = kept
+        return removed, reassigned
+
+    def remove_project(self, owner_email, project_id):
+        """
+        Queue the archive side of a project deletion, i.e. dropping its archived tasks.
+        Like remove_owner, nothing is written until commit().
+
+        Args:
+            owner_email (str): Owner email address
+            project_id (int): Project ID
+
+        Returns:
+            list: Removed entry dictionaries
+        """
+        removed = []
+
+        for segment in self.load_manifest()['segments']:
+            if owner_email not in segment['owners']:
+                continue
+            entries = self._pending_entries(segment)
+            if entries is None:
+                continue
+
+            kept = []
+            for entry in entries:
+                entry_project_id = (entry['data']['project_id'] if entry['kind'] == 'project'
+                                    else entry['project_id'])
+                if entry['owner_email'] == owner_email and entry_project_id == project_id:
+                    removed.append(entry)
+                else:
+                    kept.append(entry)
+
+            if len(kept) < len(entries):
+                self._pending[segment['file']] = kept
+        return removed
+
+    def commit(self):
+        """
+        Write the segment changes queued by remove_owner and remove_project.
+        """
+        if not self._pending:
+            return
+
+        # Reloaded, since archive_users may have added a segment in the meantime
+        manifest = self.load_manifest()
+        kept_segments = []
+        for segment in manifest['segments']:
+            entries = self._pending.get(segment['file'])
+            path = os.path.join(self.archive_dir, segment['file'])
+            if entries is None:
+                kept_segments.append(segment)
+            elif entries:
+                self._write_entries(path, entries)
+                segment.update(self._segment_summary(entries))
+                kept_segments.append(segment)
+            else:
+                os.remove(path)
+
+        manifest['segments'] = kept_segments
+        self._write_manifest(manifest)
+        self._pending = {}
+
+    def discard(self):
+        """
+        Drop the queued segment changes, e.g. because saving the live data failed.
+        """
+        self._pending = {}
+
+    def _pending_entries(self, segment):
+        """
+        Get a segment's entries, including changes queued but not yet committed.
+
+        Args:
+            segment (dict): Manifest entry of the segment
+
+        Returns:
+            list or None: Archive entry dictionaries, or None if the segment can't be read
+        """
+        if segment['file'] in self._pending:
+            return self._pending[segment['file']]
+
+        path = os.path.join(self.archive_dir, segment['file'])
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading archive segment {segment['file']}: {e}")
+            return None
+
+    def _write_segment(self, entries):
+        """
+        Write entries to a new segment and register it in the manifest.
+
+        Args:
+            entries (list): Archive entry dictionaries
+        """
+        if not os.path.exists(self.archive_dir):
+            os.makedirs(self.archive_dir)
+
+        manifest = self.load_manifest()
+        # Segments can be removed (see remove_owner), so numbers come from a counter
+        number = manifest.get('next_segment', len(manifest['segments']) + 1)
+        manifest['next_segment'] = number + 1
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        file_name = f"segment-{number:05d}-{stamp}.json.gz"
+
+        self._write_entries(os.path.join(self.archive_dir, file_name), entries)
+
+        segment = {'file': file_name}
+        segment.update(self._segment_summary(entries))
+        manifest['segments'].append(segment)
+
+        # Archived IDs must never be handed out again
+        next_ids = manifest.setdefault('next_ids', {})
+        for cls in (Project, Task):
+            next_ids[cls.__name__] = max(next_ids.get(cls.__name__, 1), cls._next_id)
+
+        self._write_manifest(manifest)
+
+    def _segment_summary(self, entries):
+        return {
+            'owners': sorted({entry['owner_email'] for entry in entries}),
+            'tasks': sum(1 for entry in entries if entry['kind'] == 'task'),
+            'projects': sum(1 for entry in entries if entry['kind'] == 'project'),
+        }
+
+    def _write_entries(self, path, entries):
+        temp_file = path + '.tmp'
+        with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(temp_file, path)
+
+    def _write_manifest(self, manifest):
+        temp_file = self.manifest_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_file, self.manifest_file)
@@ -0,0 +1,130 @@
+"""
+Storage Benchmark
+Compares file size, save time and load time for each compression codec and level
+
+Run with: python -m utils.benchmark [--users N] [--projects N] [--tasks N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from models import User, Project, Task
+from utils.data_manager import DataManager
+
+
+# (codec, level) pairs to compare; None is plain pretty-printed JSON
+SETTINGS = [
+    ('none', None),
+    ('gzip', 1), ('gzip', 6), ('gzip', 9),
+    ('zlib', 1), ('zlib', 6), ('zlib', 9),
+    ('lzma', 0), ('lzma', 6), ('lzma', 9),
+]
+
+
+def build_users(user_count, projects_per_user, tasks_per_project):
+    """
+    Build a synthetic data set.
+
+    Args:
+        user_count (int): Number of users
+        projects_per_user (int): Projects per user
+        tasks_per_project (int): Tasks per project
+
+    Returns:
+        list: List of User objects
+    """
+    statuses = ['pending', 'in_progress', 'completed']
+    users = []
+    for u in range(user_count):
+        user = User(name=f"User {u}", email=f"user{u}@example.com")
+        for p in range(projects_per_user):
+            project = Project(
+                title=f"Project {p} for user {u}",
+                description="Synthetic project used by the storage benchmark",
+                due_date=f"2025-{p % 12 + 1:02d}-15",
+                owner_email=user.email
+            )
+            for t in range(tasks_per_project):
+                project.add_task(Task(
+                    title=f"Task {t} of project {p}",
+                    status=statuses[t % 3],
+                    assigned_to=f"user{(u + t) % user_count}@example.com"
+                ))
+            user.add_project(project)
+        users.append(user)
+    return users
+
+
+def time_call(func, repeat):
+    """
+    Time a function, keeping the best of several runs.
+
+    Args:
+        func (callable): Function to time
+        repeat (int): Number of runs
+
+    Returns:
+        float: Best time in milliseconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(users, repeat=3):
+    """
+    Save and load the data set with every codec setting.
+
+    Args:
+        users (list): List of User objects
+        repeat (int): Runs per measurement
+
+    Returns:
+        list: One result dict per setting
+    """
+    results = []
+    for codec, level in SETTINGS:
+        setting = codec if level is None else f"{codec}:{level}"
+        data_dir = tempfile.mkdtemp(prefix='pm-bench-')
+        try:
+            # The cache would hide the cost of decompressing and parsing
+            manager = DataManager(data_dir, use_cache=False, compression=setting)
+            save_ms = time_call(lambda: manager.save_users(users), repeat)
+            load_ms = time_call(manager.load_users, repeat)
+            results.append({
+                'setting': setting,
+                'size': os.path.getsize(manager.users_file),
+                'save_ms': save_ms,
+                'load_ms': load_ms,
+            })
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark data file compression settings')
+    parser.add_argument('--users', type=int, default=200, help='Number of users (default: 200)')
+    parser.add_argument('--projects', type=int, default=5, help='Projects per user (default: 5)')
+    parser.add_argument('--tasks', type=int, default=20, help='Tasks per project (default: 20)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (default: 3)')
+    args = parser.parse_args()
+
+    users = build_users(args.users, args.projects, args.tasks)
+    results = run_benchmark(users, args.repeat)
+
+    baseline = results[0]['size']
+    print(f"{'setting':<10}{'size KB':>10}{'ratio':>8}{'save ms':>10}{'load ms':>10}")
+    for result in results:
+        print(f"{result['setting']:<10}{result['size'] / 1024:>10.1f}"
+              f"{result['size'] / baseline:>8.2f}{result['save_ms']:>10.1f}{result['load_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Shell Completion
+Completes subcommands, emails, project IDs and task IDs from a small index file
+
+The bash completion function runs this file directly (not through main.py),
+so it must only use the standard library and never load users.json:
+
+    python3 -S utils/completion.py LINE_BEFORE_CURSOR CURRENT_FRAGMENT
+"""
+
+import json
+import os
+import sys
+
+
+# Positional arguments of each subcommand that can be completed
+COMMANDS = {
+    'add-user': [],
+    'list-users': [],
+    'delete-user': ['email'],
+    'add-project': ['email'],
+    'list-projects': ['email'],
+    'delete-project': ['email', 'project'],
+    'add-task': ['email', 'project'],
+    'list-tasks': ['email', 'project'],
+    'complete-task': ['email', 'project', 'task'],
+    'update-task-status': ['email', 'project', 'task', 'status'],
+    'query': [],
+    'report': [],
+    'archive': [],
+    'completion': ['shell'],
+}
+
+# Options that take a value, and what kind of value it is
+VALUE_OPTIONS = {
+    '--assigned-to': 'email',
+    '--email': 'email',
+    '--reassign-to': 'email',
+    '--status': 'status',
+    '--by': 'by',
+    '--type': 'type',
+    '--order-by': None,
+    '--limit': None,
+    '--grace-days': None,
+    '--metrics-file': None,
+}
+
+CHOICES = {
+    'status': ['pending', 'in_progress', 'completed'],
+    'by': ['owner', 'assignee'],
+    'type': ['tasks', 'projects'],
+    'shell': ['bash'],
+}
+
+BASH_SCRIPT = '''# Project Manager CLI completion for bash (zsh: run "autoload bashcompinit && bashcompinit" first)
+_project_manager_complete() {{
+    local IFS=$'\\n'
+    COMPREPLY=( $(python3 -S "{script}" "${{COMP_LINE:0:COMP_POINT}}" "${{COMP_WORDS[COMP_CWORD]}}" 2>/dev/null) )
+}}
+complete -F _project_manager_complete main.py ./main.py
+# To complete "python main.py ..." as well: complete -o default -F _project_manager_complete python python3
+'''
+
+
+class CompletionIndex:
+    """
+    Emails, project IDs and task IDs, refreshed by DataManager on every save.
+
+    Layout: {"generation": N,
+             "projects": {email: [project_id, ...]},
+             "tasks": {"email/project_id": [task_id, ...]}}
+
+    The file lives outside the snapshot directories, so it records the
+    generation it was built from and is ignored once CURRENT points elsewhere.
+    """
+
+    def __init__(self, data_dir='data'):
+        """
+        Initialize the CompletionIndex.
+
+        Args:
+            data_dir (str): Directory where data files are stored
+        """
+        self.index_file = os.path.join(data_dir, 'completion.idx')
+        self.current_file = os.path.join(data_dir, 'snapshots', 'CURRENT')
+
+    @staticmethod
+    def empty():
+        return {'projects': {}, 'tasks': {}}
+
+    @staticmethod
+    def add_user(index, user_data):
+        """
+        Add (or replace) one user's entries.
+
+        Args:
+            index (dict): Completion index (modified in place)
+            user_data (dict): User dictionary as produced by User.to_dict()
+        """
+        email = user_data['email']
+        CompletionIndex.remove_user(index, email)
+        index['projects'][email] = []
+        for project in user_data.get('projects', []):
+            index['projects'][email].append(project['project_id'])
+            index['tasks'][f"{email}/{project['project_id']}"] = [
+                task['task_id'] for task in project.get('tasks', [])
+            ]
+
+    @staticmethod
+    def remove_user(index, email):
+        """
+        Remove one user's entries.
+
+        Args:
+            index (dict): Completion index (modified in place)
+            email (str): User email address
+        """
+        for project_id in index['projects'].pop(email, []):
+            index['tasks'].pop(f"{email}/{project_id}", None)
+
+    def current_generation(self):
+        """
+        Get the published snapshot generation (as SnapshotStore.current(),
+        which can't be imported here).
+
+        Returns:
+            int: Generation number (0 if nothing has been published yet)
+        """
+        try:
+            with open(self.current_file, 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def read(self, generation):
+        """
+        Load the completion index.
+
+        Args:
+            generation (int): Generation the index must have been built from
+
+        Returns:
+            dict or None: The index, or None if missing, unreadable or out of date
+        """
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('generation') != generation:
+            return None
+        return index
+
+    def write(self, index, generation):
+        """
+        Write the completion index.
+
+        Args:
+            index (dict): Completion index
+            generation (int): Published generation the index describes
+        """
+        temp_file = self.index_file + '.tmp'
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(dict(index, generation=generation), f, separators=(',', ':'))
+            os.replace(temp_file, self.index_file)
+        except OSError:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+def complete(words, cword, index):
+    """
+    Work out the candidates for the word being completed.
+
+    Args:
+        words (list): Command line words up to the cursor
+        cword (int): Index of the word being completed
+        index (dict): Completion index, or None if there is none
+
+    Returns:
+        list: Candidate strings starting with the current word
+    """
+    current = words[cword] if cword < len(words) else ''
+
+    # Skip "python" and anything before main.py
+    start = 1
+    for i, word in enumerate(words[:cword]):
+        if word.endswith('main.py'):
+            start = i + 1
+            break
+
+    command = None
+    positionals = []
+    expecting = False
+    for word in words[start:cword]:
+        if expecting is not False:
+            expecting = False
+            continue
+        if word.startswith('-'):
+            if word in VALUE_OPTIONS:
+                expecting = VALUE_OPTIONS[word]
+            continue
+        if command is None:
+            command = word
+        else:
+            positionals.append(word)
+
+    # Value for an option such as --assigned-to
+    previous = words[cword - 1] if cword > 0 else ''
+    if previous in VALUE_OPTIONS:
+        kind = VALUE_OPTIONS[previous]
+        return _filter(_values(kind, [], index), current)
+
+    if current.startswith('-'):
+        return []
+
+    if command is None:
+        return _filter(list(COMMANDS), current)
+
+    arguments = COMMANDS.get(command, [])
+    if len(positionals) >= len(arguments):
+        return []
+    return _filter(_values(arguments[len(positionals)], positionals, index), current)
+
+
+def _values(kind, positionals, index):
+    if kind in CHOICES:
+        return CHOICES[kind]
+    if index is None:
+        return []
+    if kind == 'email':
+        return sorted(index['projects'])
+    if kind == 'project' and positionals:
+        return [str(project_id) for project_id in index['projects'].get(positionals[0], [])]
+    if kind == 'task' and len(positionals) >= 2:
+        key = f"{positionals[0]}/{positionals[1]}"
+        return [str(task_id) for task_id in index['tasks'].get(key, [])]
+    return []
+
+
+def _filter(candidates, prefix):
+    return [candidate for candidate in candidates if candidate.startswith(prefix)]
+
+
+def bash_script():
+    """
+    Get the bash completion script for this checkout.
+
+    Returns:
+        str: Script to source from .bashrc
+    """
+    return BASH_SCRIPT.format(script=os.path.abspath(__file__))
+
+
+def main(argv):
+    if len(argv) < 2:
+        return
+    line, fragment = argv[0], argv[1]
+
+    words = line.split()
+    if not line or line[-1].isspace():
+        words.append('')
+    cword = len(words) - 1
+
+    # Bash splits words at characters such as "@", so it only replaces the
+    # fragment after the last one; drop whatever comes before it
+    current = words[cword]
+    skip = len(current) - len(fragment) if current.endswith(fragment) else 0
+
+    completions = CompletionIndex('data')
+    index = completions.read(completions.current_generation())
+    for candidate in complete(words, cword, index):
+        print(candidate[skip:])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,186 @@
+"""
+Compression Utilities
+Streaming compressed readers/writers for the data files
+"""
+
+import gzip
+import lzma
+import os
+import zlib
+
+
+# Environment variable selecting the storage codec, e.g. PM_COMPRESSION=gzip:6
+COMPRESSION_ENV_VAR = 'PM_COMPRESSION'
+
+# Codec name -> file suffix added to users.json
+CODECS = {
+    'gzip': '.gz',
+    'zlib': '.zz',
+    'lzma': '.xz',
+}
+
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'zlib': 6,
+    'lzma': 6,
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_compression(value):
+    """
+    Parse a compression setting such as "gzip", "lzma:9" or "none".
+
+    Args:
+        value (str): Setting to parse
+
+    Returns:
+        tuple: (codec name or None, level or None)
+
+    Raises:
+        ValueError: If the codec or level is invalid
+    """
+    if not value or value.strip().lower() in ('none', 'off', '0'):
+        return None, None
+
+    codec, _, level = value.strip().lower().partition(':')
+    if codec not in CODECS:
+        raise ValueError(f"Compression must be one of: none, {', '.join(CODECS)}")
+    if not level:
+        return codec, DEFAULT_LEVELS[codec]
+
+    level = int(level)
+    if not 0 <= level <= 9:
+        raise ValueError("Compression level must be between 0 and 9")
+    return codec, level
+
+
+def compression_from_env():
+    """
+    Get the compression setting from the environment.
+
+    Returns:
+        tuple: (codec name or None, level or None)
+    """
+    try:
+        return parse_compression(os.environ.get(COMPRESSION_ENV_VAR, ''))
+    except ValueError as e:
+        print(f"Warning: ignoring {COMPRESSION_ENV_VAR}: {e}")
+        return None, None
+
+
+def open_writer(fileobj, codec, level):
+    """
+    Wrap a binary file so everything written to it is compressed on the fly.
+
+    Args:
+        fileobj: Binary file object to write compressed data to
+        codec (str): Codec name, or None for no compression
+        level (int): Compression level (preset for lzma)
+
+    Returns:
+        A binary file-like object; close() it to flush the compressor
+    """
+    if codec is None:
+        return _Passthrough(fileobj)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=level, mtime=0)
+    if codec == 'lzma':
+        return lzma.LZMAFile(fileobj, 'wb', preset=level)
+    if codec == 'zlib':
+        return _ZlibWriter(fileobj, level)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def open_reader(fileobj, codec):
+    """
+    Wrap a binary file so reads return decompressed data.
+
+    Args:
+        fileobj: Binary file object holding compressed data
+        codec (str): Codec name, or None for no compression
+
+    Returns:
+        A binary file-like object
+    """
+    if codec is None:
+        return _Passthrough(fileobj)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if codec == 'lzma':
+        return lzma.LZMAFile(fileobj, 'rb')
+    if codec == 'zlib':
+        return _ZlibReader(fileobj)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+class _Passthrough:
+    """
+    No-op wrapper so uncompressed files share the codec interface.
+
+    close() leaves the underlying file open, like the codec wrappers do.
+    """
+
+    def __init__(self, fileobj):
+        self._f = fileobj
+
+    def write(self, data):
+        return self._f.write(data)
+
+    def read(self, size=-1):
+        return self._f.read(size)
+
+    def close(self):
+        pass
+
+
+class _ZlibWriter:
+    """
+    Streaming zlib compressor (the zlib module has no file wrapper).
+    """
+
+    def __init__(self, fileobj, level):
+        self._f = fileobj
+        self._compressor = zlib.compressobj(level)
+
+    def write(self, data):
+        self._f.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if self._compressor is not None:
+            self._f.write(self._compressor.flush())
+            self._compressor = None
+
+
+class _ZlibReader:
+    """
+    Streaming zlib decompressor.
+    """
+
+    def __init__(self, fileobj):
+        self._f = fileobj
+        self._decompressor = zlib.decompressobj()
+
+    def read(self, size=-1):
+        chunks = []
+        total = 0
+        while size < 0 or total < size:
+            if self._decompressor.unconsumed_tail:
+                data = self._decompressor.unconsumed_tail
+            else:
+                data = self._f.read(CHUNK_SIZE)
+                if not data:
+                    chunks.append(self._decompressor.flush())
+                    break
+            limit = 0 if size < 0 else size - total
+            chunk = self._decompressor.decompress(data, limit)
+            chunks.append(chunk)
+            total += len(chunk)
+            if self._decompressor.eof:
+                break
+        return b''.join(chunks)
+
+    def close(self):
+        pass
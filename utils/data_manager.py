@@ -3,50 +3,266 @@ Data Persistence Utilities
 Handles saving and loading data to/from JSON files
 """
 
+import hashlib
 import json
+import mmap
 import os
+import marshal
+import shutil
+from contextlib import contextmanager
 from models import User, Project, Task
+from utils.archive import ArchiveManager
+from utils.compression import (
+    CODECS, compression_from_env, open_reader, open_writer, parse_compression
+)
+from utils.completion import CompletionIndex
+from utils.query import QueryIndex
+from utils.snapshots import SnapshotStore
+
+
+# Bump when the layout of the cache changes so old caches are ignored
+CACHE_VERSION = 4
+INDEX_VERSION = 1
+
+# Files making up one version of the data (the legacy layout keeps them in data/)
+SNAPSHOT_FILES = ('users.json', *('users.json' + suffix for suffix in CODECS.values()),
+                  'users.idx', 'users.cache', 'query.idx')
+
+
+class _HashingFile:
+    """
+    Binary file wrapper that hashes everything read or written through it.
+    """
+    
+    def __init__(self, f):
+        self._f = f
+        self.hash = hashlib.sha256()
+    
+    def write(self, data):
+        self.hash.update(data)
+        return self._f.write(data)
+    
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.hash.update(data)
+        return data
+
+
+class _RecordWriter:
+    """
+    Text writer that encodes to UTF-8 and counts the (uncompressed) bytes written.
+    """
+    
+    def __init__(self, f):
+        self._f = f
+        self.size = 0
+    
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.size += len(data)
+        self._f.write(data)
 
 
 class DataManager:
     """
     Manages saving and loading data to/from JSON files.
+    
+    A marshalled copy of the decoded records is kept in users.cache, keyed
+    on the size, mtime and hash of users.json (like a .pyc next to its .py).
+    It holds plain dicts only (never pickle), because the data directory
+    may be shared and loading it must not be able to run code.
+    
+    users.idx maps each email to the byte range of its record so single
+    users can be read and rewritten without parsing the whole file.
+    
+    The data file can optionally be stored compressed (users.json.gz,
+    .zz or .xz). Compression is streamed while writing and reading; the
+    offset index is only used for uncompressed files.
+    
+    All of these files live in a snapshot directory (see SnapshotStore).
+    Reads use the generation that was current when the DataManager was
+    created; every save writes a new generation and switches to it. A
+    published data file is never modified, though a reader may rebuild a
+    missing index or cache next to it.
     """
     
-    def __init__(self, data_dir='data'):
+    def __init__(self, data_dir='data', use_cache=True, compression=None):
         """
         Initialize the DataManager.
         
         Args:
             data_dir (str): Directory where data files are stored
+            use_cache (bool): Whether to read and write the parsed-data cache
+            compression (str): Codec and level such as "gzip:6" or "none"
+                (defaults to the PM_COMPRESSION environment variable)
         """
+        if compression is None:
+            self.compression, self.compression_level = compression_from_env()
+        else:
+            self.compression, self.compression_level = parse_compression(compression)
+        
         self.data_dir = data_dir
-        self.users_file = os.path.join(data_dir, 'users.json')
+        self.use_cache = use_cache
+        self.archive = ArchiveManager(data_dir)
+        self.completion_index = CompletionIndex(data_dir)
+        self.snapshots = SnapshotStore(data_dir, SNAPSHOT_FILES)
         
         # Create data directory if it doesn't exist
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
+        
+        # Pin the current snapshot so a concurrent save can't change it under us
+        self._lease = None
+        self._use(*self.snapshots.pin())
+    
+    @contextmanager
+    def write_lock(self):
+        """
+        Hold the writer lock and switch to the newest published generation.
+        
+        Wrap a whole read-modify-write (load, change, save) in this: reads
+        inside it see the latest data, and no other writer can publish a
+        generation before the save. Re-entrant.
+        """
+        with self.snapshots.lock():
+            generation = self.snapshots.current()
+            if generation != self.generation:
+                self._use(generation, self.snapshots.acquire(generation))
+            yield
     
     def save_users(self, users):
         """
         Save a list of users to JSON file.
         
+        The file is written one record at a time so the byte range of each
+        user can be recorded in the offset index (users.idx).
+        
         Args:
             users (list): List of User objects
         """
         try:
-            # Convert users to dictionaries
-            users_data = [user.to_dict() for user in users]
-            
-            # Write to file with nice formatting
-            with open(self.users_file, 'w') as f:
-                json.dump(users_data, f, indent=2)
-            
+            with self.snapshots.lock():
+                if not self._is_latest("saving users"):
+                    return False
+                with self._next_generation():
+                    completions = self._write_users(users)
+                # Only once the generation is published, since it is stamped with it
+                self.completion_index.write(completions, self.generation)
             return True
         except Exception as e:
             print(f"Error saving users: {e}")
             return False
     
+    def save_user(self, user):
+        """
+        Save a single user without re-encoding the whole file (see save_changes).
+        
+        Args:
+            user (User): User to save (new or existing)
+            
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        return self.save_changes([user])
+    
+    def delete_user(self, email):
+        """
+        Remove a single user without re-encoding the whole file (see save_changes).
+        
+        Args:
+            email (str): Email of the user to remove
+            
+        Returns:
+            bool: True if removed (or already absent), False on error
+        """
+        return self.save_changes([], [email])
+    
+    def save_changes(self, users, deleted_emails=()):
+        """
+        Save changed users and remove deleted ones in one new generation.
+        
+        The pinned generation's data file is copied once and patched there:
+        each record is rewritten in place when it still fits in its old byte
+        range (padded with whitespace); otherwise the old slot is replaced with
+        null and the record is appended to the end of the array. Deleted users'
+        slots are replaced with null. Readers see all of the changes or none.
+        
+        Args:
+            users (list): User objects to save (new or existing)
+            deleted_emails (iterable): Emails of users to remove
+            
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        users = list(users)
+        deleted_emails = set(deleted_emails)
+        
+        with self.snapshots.lock():
+            if not self._is_latest("saving users"):
+                return False
+            
+            index = self._read_index()
+            if index is None or index['wasted'] * 2 > index['size']:
+                # No usable index, or mostly dead slots left by earlier appends:
+                # fall back to a full (compacting) rewrite
+                changed = deleted_emails | {user.email for user in users}
+                kept = [u for u in self.load_users() if u.email not in changed]
+                return self.save_users(kept + users)
+            
+            records = index['records']
+            deleted = [email for email in deleted_emails if email in records]
+            if not users and not deleted:
+                return True
+            
+            try:
+                postings = self.query_index.read(self.users_file)
+                wasted = index['wasted']
+                source = self.users_file
+                previous = self.generation
+                users_data, appended = [], []
+                
+                with self._next_generation():
+                    shutil.copyfile(source, self.users_file)
+                    with open(self.users_file, 'r+b') as f:
+                        for email in deleted:
+                            wasted += self._clear_slot(f, records.pop(email))
+                        
+                        for user in users:
+                            data = user.to_dict()
+                            users_data.append(data)
+                            record = self._format_record(data).encode('utf-8')
+                            span = records.get(user.email)
+                            if span and len(record) <= span[1] - span[0]:
+                                f.seek(span[0])
+                                f.write(record.ljust(span[1] - span[0]))
+                            else:
+                                if span:
+                                    wasted += self._clear_slot(f, span)
+                                appended.append((user.email, record))
+                        
+                        if appended:
+                            self._append_records(f, appended, records, source)
+                    
+                    self._write_index(records, index['next_ids'], wasted)
+                    if postings is not None:
+                        for email in deleted:
+                            QueryIndex.remove_user(postings, email)
+                        for data in users_data:
+                            QueryIndex.remove_user(postings, data['email'])
+                            QueryIndex.add_user(postings, data)
+                        self.query_index.write(postings, self.users_file)
+                
+                def change(completions):
+                    for email in deleted:
+                        CompletionIndex.remove_user(completions, email)
+                    for data in users_data:
+                        CompletionIndex.add_user(completions, data)
+                self._update_completions(change, previous)
+                return True
+            except Exception as e:
+                print(f"Error saving users: {e}")
+                return False
+    
     def load_users(self):
         """
         Load users from JSON file.
@@ -55,25 +271,586 @@ class DataManager:
             list: List of User objects, or empty list if file doesn't exist
         """
         # If file doesn't exist, return empty list
-        if not os.path.exists(self.users_file):
+        source = self._source_file()
+        if source is None:
             return []
+        current = source == self.users_file
+        
+        # Parse the JSON at least once whenever the offset index needs rebuilding
+        index = self._read_index()
+        if current and (index is not None or self.compression is not None):
+            users = self._read_cache()
+            if users is not None:
+                return users
         
         try:
-            # Read from file
-            with open(self.users_file, 'r') as f:
-                users_data = json.load(f)
+            # Read from file, decompressing as we go
+            with open(source, 'rb') as f:
+                disk = _HashingFile(f)
+                stream = open_reader(disk, self._codec_of(source))
+                raw = stream.read()
+                stream.close()
+                # Make sure the hash covers the whole file
+                disk.read()
+            users_data, spans = self._decode_records(raw)
+            
+            # Convert dictionaries to User objects (null marks a record moved by save_user)
+            users = [User.from_dict(data) for data in users_data if data is not None]
+            # IDs of archived objects aren't in the live data but must not be reused
+            self._restore_next_ids(self.archive.next_ids())
+            
+            if not current:
+                # Written with another compression setting; the next save converts it
+                return users
+            
+            if spans is not None and index is None and self.compression is None:
+                records = {
+                    data['email']: span
+                    for data, span in zip(users_data, spans) if data is not None
+                }
+                live = sum(end - start for start, end in records.values())
+                self._write_index(records, wasted=len(raw) - live)
             
-            # Convert dictionaries to User objects
-            users = [User.from_dict(data) for data in users_data]
+            if self.query_index.read(self.users_file) is None:
+                postings = QueryIndex.empty()
+                for data in users_data:
+                    if data is not None:
+                        QueryIndex.add_user(postings, data)
+                self.query_index.write(postings, self.users_file)
+            
+            # Only for the published generation, or it would replace a newer index
+            if (self.generation == self.snapshots.current()
+                    and self.completion_index.read(self.generation) is None):
+                completions = CompletionIndex.empty()
+                for data in users_data:
+                    if data is not None:
+                        CompletionIndex.add_user(completions, data)
+                self.completion_index.write(completions, self.generation)
+            self._write_cache([data for data in users_data if data is not None],
+                              disk.hash.hexdigest())
             return users
             
         except json.JSONDecodeError:
-            print(f"Error: {self.users_file} contains invalid JSON")
+            print(f"Error: {source} contains invalid JSON")
             return []
         except Exception as e:
             print(f"Error loading users: {e}")
             return []
     
+    def load_user(self, email):
+        """
+        Load a single user, decoding only that user's record.
+        
+        Uses the offset index to memory-map users.json and parse just the
+        byte range of the record. Falls back to a full load if the index is
+        missing or out of date.
+        
+        Args:
+            email (str): Email of the user to load
+            
+        Returns:
+            User or None: The user if found, None otherwise
+        """
+        index = self._read_index()
+        if index is None:
+            return self.find_user_by_email(self.load_users(), email)
+        
+        span = index['records'].get(email)
+        if span is None:
+            return None
+        
+        try:
+            with open(self.users_file, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = json.loads(mapped[span[0]:span[1]])
+            if data['email'] != email:
+                raise ValueError("Offset index does not match data file")
+        except Exception:
+            return self.find_user_by_email(self.load_users(), email)
+        
+        # Other users' IDs are not loaded, so take the ID counters from the index
+        self._restore_next_ids(index['next_ids'])
+        return User.from_dict(data, reserve_ids=False)
+    
+    def user_exists(self, email):
+        """
+        Check whether a user exists, using the offset index when possible.
+        
+        Args:
+            email (str): Email to search for
+            
+        Returns:
+            bool: True if a user with that email exists
+        """
+        index = self._read_index()
+        if index is None:
+            return self.find_user_by_email(self.load_users(), email) is not None
+        return email in index['records']
+    
+    def sync_next_ids(self):
+        """
+        Make sure new objects get IDs that don't clash with saved ones.
+        
+        Needed before creating objects when the full user list hasn't been
+        loaded (loading it bumps the ID counters as a side effect).
+        """
+        index = self._read_index()
+        if index is None:
+            self.load_users()
+        else:
+            self._restore_next_ids(index['next_ids'])
+    
+    def has_offset_index(self):
+        """
+        Check whether single users can currently be read through the offset index.
+        
+        Returns:
+            bool: True if the offset index is usable
+        """
+        return self._read_index() is not None
+    
+    def find_assigned_tasks(self, email):
+        """
+        Find every task assigned to a user, using the query index's assignee postings.
+        
+        Args:
+            email (str): Assignee email address
+            
+        Returns:
+            list or None: (owner_email, project_id, task_id) tuples, or None
+                          if the index is unavailable
+        """
+        postings = self.load_query_index()
+        if postings is None:
+            return None
+        return [tuple(entry) for entry in postings['assignee'].get(email, [])]
+    
+    def load_query_index(self):
+        """
+        Load the status/assignee/due date postings used by queries.
+        
+        Returns:
+            dict or None: The postings, or None if missing or stale
+        """
+        return self.query_index.read(self.users_file)
+    
+    def _use(self, generation, lease=None):
+        """
+        Point the data file paths at a snapshot generation.
+        
+        Args:
+            generation (int): Generation number
+            lease (str): Lease on the generation, replacing the current lease
+        """
+        if lease is not None:
+            self.snapshots.release(self._lease)
+            self._lease = lease
+        
+        self.generation = generation
+        self.snapshot_dir = self.snapshots.directory(generation)
+        self.users_file = self._data_file(self.compression)
+        self.cache_file = os.path.join(self.snapshot_dir, 'users.cache')
+        self.index_file = os.path.join(self.snapshot_dir, 'users.idx')
+        self.query_index = QueryIndex(self.snapshot_dir)
+    
+    @contextmanager
+    def _next_generation(self):
+        """
+        Write the next snapshot generation and publish it if nothing fails.
+        
+        The data file paths point into the new generation's directory while
+        the block runs. Call with the writer lock held.
+        """
+        previous = self.generation
+        generation = self.snapshots.prepare()
+        self._use(generation)
+        try:
+            yield
+            # The derived files are checked before use, but the data must be on disk
+            with open(self.users_file, 'rb') as f:
+                os.fsync(f.fileno())
+            self.snapshots.publish(generation)
+        except BaseException:
+            self.snapshots.discard(generation)
+            self._use(previous)
+            raise
+        
+        self._use(generation, self.snapshots.acquire(generation))
+        self.snapshots.collect_garbage()
+    
+    def _clear_slot(self, f, span):
+        """
+        Replace a record with null, padded to the same length.
+        
+        Args:
+            f: Data file opened for binary update
+            span (list): [start, end] byte range of the record
+            
+        Returns:
+            int: Number of bytes that are now dead space
+        """
+        f.seek(span[0])
+        f.write(b'null'.ljust(span[1] - span[0]))
+        return span[1] - span[0]
+    
+    def _append_records(self, f, appended, records, source):
+        """
+        Append records to the end of the array, recording their byte ranges.
+        
+        Args:
+            f: Data file opened for binary update
+            appended (list): (email, encoded record) pairs
+            records (dict): Email -> [start, end] byte range (updated in place)
+            source (str): File the data was copied from, for error messages
+        """
+        # Re-open the array just before its closing bracket
+        size = f.seek(0, os.SEEK_END)
+        if size == 2:
+            position, separator = 0, b'[\n'
+        else:
+            position, separator = size - 2, b',\n'
+        f.seek(position)
+        if f.read(2) not in (b'[]', b'\n]'):
+            raise ValueError(f"{source} does not end as expected")
+        
+        f.seek(position)
+        for email, record in appended:
+            f.write(separator)
+            start = f.tell()
+            f.write(record)
+            records[email] = [start, start + len(record)]
+            separator = b',\n'
+        f.write(b'\n]')
+        f.truncate()
+    
+    def _is_latest(self, action):
+        """
+        Check that no other writer has published since this DataManager's
+        generation was read. Call with the writer lock held.
+        
+        Args:
+            action (str): What is being saved, for the error message
+            
+        Returns:
+            bool: True if saving on top of the pinned generation is safe
+        """
+        if self.snapshots.current() == self.generation:
+            return True
+        print(f"Error {action}: the data was changed by another command after it was read; "
+              f"nothing was saved")
+        return False
+    
+    def _write_users(self, users):
+        """
+        Write users.json and its indexes into the current snapshot directory.
+        
+        Args:
+            users (list): List of User objects
+            
+        Returns:
+            dict: Shell completion index for the users, for the caller to
+                  write once the generation is published
+        """
+        records = {}
+        users_data = []
+        postings = QueryIndex.empty()
+        completions = CompletionIndex.empty()
+        
+        # Write to file with nice formatting (same layout as json.dump(..., indent=2)),
+        # compressing as we go when a codec is configured
+        with open(self.users_file, 'wb') as f:
+            disk = _HashingFile(f)
+            stream = open_writer(disk, self.compression, self.compression_level)
+            writer = _RecordWriter(stream)
+            if not users:
+                writer.write('[]')
+            else:
+                writer.write('[\n')
+                for i, user in enumerate(users):
+                    if i:
+                        writer.write(',\n')
+                    data = user.to_dict()
+                    start = writer.size
+                    writer.write(self._format_record(data))
+                    records[user.email] = [start, writer.size]
+                    users_data.append(data)
+                    QueryIndex.add_user(postings, data)
+                    CompletionIndex.add_user(completions, data)
+                writer.write('\n]')
+            stream.close()
+        
+        if self.compression is None:
+            self._write_index(records)
+        self.query_index.write(postings, self.users_file)
+        self._write_cache(users_data, disk.hash.hexdigest())
+        return completions
+    
+    def _update_completions(self, change, previous):
+        """
+        Apply a change to the shell completion index, if there is one.
+        Call after publishing the generation that contains the change.
+        
+        A missing or out-of-date index is left for the next full load or save to rebuild.
+        
+        Args:
+            change (callable): Function that modifies the index in place
+            previous (int): Generation the change was made on top of
+        """
+        completions = self.completion_index.read(previous)
+        if completions is not None:
+            change(completions)
+            self.completion_index.write(completions, self.generation)
+    
+    def _format_record(self, data):
+        """
+        Format one user record as it appears inside the pretty-printed array.
+        
+        Args:
+            data (dict): User dictionary
+            
+        Returns:
+            str: JSON text indented one level
+        """
+        return '  ' + json.dumps(data, indent=2).replace('\n', '\n  ')
+    
+    def _decode_records(self, raw):
+        """
+        Decode the users array, recording the byte range of each element.
+        
+        Args:
+            raw (bytes): Contents of users.json
+            
+        Returns:
+            tuple: (list of dicts, list of [start, end] spans or None if the
+                   spans can't be used as byte offsets)
+        """
+        text = raw.decode('utf-8')
+        if len(text) != len(raw) or not text.lstrip().startswith('['):
+            # Non-ASCII content: character offsets aren't byte offsets
+            return json.loads(text), None
+        
+        decoder = json.JSONDecoder()
+        whitespace = ' \t\r\n'
+        records, spans = [], []
+        
+        position = text.index('[') + 1
+        while True:
+            while position < len(text) and text[position] in whitespace:
+                position += 1
+            if text.startswith(']', position) and not records:
+                break
+            data, end = decoder.raw_decode(text, position)
+            records.append(data)
+            spans.append([position, end])
+            while end < len(text) and text[end] in whitespace:
+                end += 1
+            if text.startswith(']', end):
+                break
+            if not text.startswith(',', end):
+                raise json.JSONDecodeError("Expected ',' or ']'", text, end)
+            position = end + 1
+        
+        return records, spans
+    
+    def _read_index(self):
+        """
+        Load the offset index if it matches the current users.json.
+        
+        Returns:
+            dict or None: The index, or None if it is missing or stale
+        """
+        if self.compression is not None:
+            return None
+        
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            stat = os.stat(self.users_file)
+            if index.get('version') != INDEX_VERSION:
+                return None
+            if index['size'] != stat.st_size or index['mtime_ns'] != stat.st_mtime_ns:
+                return None
+            return index
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _write_index(self, records, next_ids=None, wasted=0):
+        """
+        Write the offset index for the current users.json.
+        
+        Args:
+            records (dict): Email -> [start, end] byte range
+            next_ids (dict): ID counters already recorded, merged with the current ones
+            wasted (int): Bytes taken up by null slots left behind by save_user
+        """
+        next_ids = dict(next_ids or {})
+        for cls in (User, Project, Task):
+            next_ids[cls.__name__] = max(next_ids.get(cls.__name__, 1), cls._next_id)
+        
+        stat = os.stat(self.users_file)
+        index = {
+            'version': INDEX_VERSION,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'next_ids': next_ids,
+            'wasted': wasted,
+            'records': records,
+        }
+        
+        temp_file = self.index_file + '.tmp'
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(index, f)
+            os.replace(temp_file, self.index_file)
+        except OSError:
+            self._remove_file(temp_file)
+    
+    def _data_file(self, codec):
+        """
+        Get the data file path used for a codec.
+        
+        Args:
+            codec (str): Codec name, or None for uncompressed
+            
+        Returns:
+            str: Path to users.json with the codec's suffix in the snapshot directory
+        """
+        return os.path.join(self.snapshot_dir, 'users.json' + CODECS.get(codec, ''))
+    
+    def _codec_of(self, path):
+        """
+        Get the codec a data file was written with, from its suffix.
+        
+        Args:
+            path (str): Data file path
+            
+        Returns:
+            str or None: Codec name, or None for uncompressed
+        """
+        for codec, suffix in CODECS.items():
+            if path.endswith(suffix):
+                return codec
+        return None
+    
+    def _source_file(self):
+        """
+        Find the data file to read, preferring the configured format.
+        
+        Returns:
+            str or None: Path of an existing data file, or None if there is none
+        """
+        candidates = [self.users_file] + [self._data_file(codec) for codec in (None, *CODECS)]
+        for path in candidates:
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def _restore_next_ids(self, next_ids):
+        """
+        Raise the class ID counters to at least the recorded values.
+        
+        Args:
+            next_ids (dict): Class name -> next ID
+        """
+        for cls in (User, Project, Task):
+            cls._next_id = max(cls._next_id, next_ids.get(cls.__name__, 1))
+    
+    def _remove_file(self, path):
+        """
+        Remove a file if it exists, ignoring errors.
+        
+        Args:
+            path (str): File to remove
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def _read_cache(self):
+        """
+        Load users from the cache if it matches the current users.json.
+        
+        Any problem with the cache (missing, stale, corrupt) returns None so
+        the caller falls back to parsing the JSON.
+        
+        Returns:
+            list or None: List of User objects, or None if the cache is unusable
+        """
+        if not self.use_cache or not os.path.exists(self.cache_file):
+            return None
+        
+        try:
+            stat = os.stat(self.users_file)
+            with open(self.cache_file, 'rb') as f:
+                header = marshal.load(f)
+                if header.get('version') != CACHE_VERSION:
+                    return None
+                if header['size'] != stat.st_size:
+                    return None
+                if header['mtime_ns'] != stat.st_mtime_ns:
+                    # Same size but touched or copied: only trust it if the content matches
+                    if header['sha256'] != self._hash_file(self.users_file):
+                        return None
+                # marshal.load reads a file in small pieces; decoding from bytes is much faster
+                payload = marshal.loads(f.read())
+            
+            # Projects and tasks are only built from these dicts when used, and
+            # the stored counters stand in for walking them to reserve their IDs
+            users = [User.from_dict(data, reserve_ids=False) for data in payload['records']]
+            self._restore_next_ids(payload['next_ids'])
+            return users
+        except Exception:
+            return None
+    
+    def _write_cache(self, users_data, sha256):
+        """
+        Write the cache for the current users.json.
+        
+        Args:
+            users_data (list): User dictionaries matching users.json
+            sha256 (str): Hex digest of users.json
+        """
+        if not self.use_cache:
+            return
+        
+        temp_file = self.cache_file + '.tmp'
+        try:
+            stat = os.stat(self.users_file)
+            header = {
+                'version': CACHE_VERSION,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256,
+            }
+            payload = {
+                'records': users_data,
+                'next_ids': {cls.__name__: cls._next_id for cls in (User, Project, Task)},
+            }
+            with open(temp_file, 'wb') as f:
+                marshal.dump(header, f)
+                marshal.dump(payload, f)
+            os.replace(temp_file, self.cache_file)
+        except Exception:
+            # The cache is only an optimization; never fail a load or save over it
+            self._remove_file(temp_file)
+    
+    def _hash_file(self, path):
+        """
+        Compute the SHA-256 of a file without reading it all at once.
+        
+        Args:
+            path (str): File to hash
+            
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
     def find_user_by_email(self, users, email):
         """
         Find a user by email address.
@@ -118,9 +895,10 @@ class DataManager:
             return False
         
         try:
-            backup_file = self.users_file + '.backup'
-            with open(self.users_file, 'r') as source:
-                with open(backup_file, 'w') as backup:
+            # Kept outside the snapshot directory, which is removed once it is out of date
+            backup_file = os.path.join(self.data_dir, os.path.basename(self.users_file) + '.backup')
+            with open(self.users_file, 'rb') as source:
+                with open(backup_file, 'wb') as backup:
                     backup.write(source.read())
             print(f"Backup created: {backup_file}")
             return True
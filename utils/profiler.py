@@ -0,0 +1,256 @@
+"""
+Profiling Utilities
+Records per-phase timing and memory usage for a single CLI run
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Environment variable used to turn profiling on without the --profile flag.
+# Accepts "1"/"timing", optionally combined with "cprofile" and/or
+# "tracemalloc", e.g. PM_PROFILE=cprofile,tracemalloc
+PROFILE_ENV_VAR = 'PM_PROFILE'
+METRICS_FILE_ENV_VAR = 'PM_METRICS_FILE'
+DEFAULT_METRICS_FILE = os.path.join('data', 'metrics.jsonl')
+
+
+def _max_rss_kb():
+    """
+    Get the peak resident set size of this process.
+
+    Returns:
+        int or None: Peak RSS in kilobytes, or None if unavailable
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == 'darwin':
+        usage //= 1024
+    return usage
+
+
+class Profiler:
+    """
+    Collects wall time, CPU time and peak memory for named phases.
+
+    A disabled profiler turns every call into a no-op so it can be
+    threaded through the CLI unconditionally.
+    """
+
+    def __init__(self, enabled=False, use_cprofile=False, trace_memory=False,
+                 metrics_file=None, started=None):
+        """
+        Initialize the Profiler.
+
+        Args:
+            enabled (bool): Whether to record anything at all
+            use_cprofile (bool): Run cProfile around profile_call()
+            trace_memory (bool): Use tracemalloc for per-phase peak memory
+            metrics_file (str): JSON lines file that results are appended to
+            started (float): perf_counter() value the run started at
+        """
+        self.enabled = enabled or use_cprofile or trace_memory
+        self.use_cprofile = use_cprofile
+        self.trace_memory = trace_memory
+        self.metrics_file = metrics_file or DEFAULT_METRICS_FILE
+        self.phases = {}
+        self.cprofile_file = None
+        self._peak_stack = []
+        self._started = started if started is not None else time.perf_counter()
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_settings(cls, flag=False, use_cprofile=False, trace_memory=False,
+                      metrics_file=None, started=None):
+        """
+        Build a profiler from command line flags and the environment.
+
+        Args:
+            flag (bool): Value of the --profile flag
+            use_cprofile (bool): Value of the --profile-cprofile flag
+            trace_memory (bool): Value of the --profile-memory flag
+            metrics_file (str): Value of the --metrics-file option
+            started (float): perf_counter() value the run started at
+
+        Returns:
+            Profiler: A configured (possibly disabled) profiler
+        """
+        env_value = os.environ.get(PROFILE_ENV_VAR, '').strip().lower()
+        tokens = {token.strip() for token in env_value.split(',') if token.strip()}
+        tokens.discard('0')
+
+        return cls(
+            enabled=flag or bool(tokens),
+            use_cprofile=use_cprofile or 'cprofile' in tokens,
+            trace_memory=trace_memory or 'tracemalloc' in tokens,
+            metrics_file=metrics_file or os.environ.get(METRICS_FILE_ENV_VAR),
+            started=started
+        )
+
+    def record(self, name, wall, cpu, peak_kb=None):
+        """
+        Add a measurement to a phase, accumulating repeated phases.
+
+        Args:
+            name (str): Phase name
+            wall (float): Wall clock seconds
+            cpu (float): CPU seconds
+            peak_kb (float): Peak traced memory in kilobytes, if known
+        """
+        if not self.enabled:
+            return
+
+        phase = self.phases.setdefault(
+            name, {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0}
+        )
+        phase['calls'] += 1
+        phase['wall_ms'] += wall * 1000
+        phase['cpu_ms'] += cpu * 1000
+        if peak_kb is not None:
+            phase['peak_kb'] = max(phase.get('peak_kb', 0.0), peak_kb)
+
+        max_rss = _max_rss_kb()
+        if max_rss is not None:
+            phase['max_rss_kb'] = max_rss
+
+    def phase(self, name):
+        """
+        Measure a block of code as a named phase.
+
+        Args:
+            name (str): Phase name
+
+        Returns:
+            A context manager wrapping the block
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Remember the enclosing phase's peak before resetting it
+            if self._peak_stack:
+                self._peak_stack[-1] = max(self._peak_stack[-1],
+                                           tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peak_stack.append(0)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_kb = None
+            if tracing:
+                peak = max(self._peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peak_stack:
+                    self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+                peak_kb = peak / 1024
+            self.record(name, wall, cpu, peak_kb)
+
+    def profile_call(self, name, func, *args, **kwargs):
+        """
+        Run a function as a named phase, under cProfile if requested.
+
+        Args:
+            name (str): Phase name
+            func (callable): Function to run
+
+        Returns:
+            The function's return value
+        """
+        if not self.use_cprofile:
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        with self.phase(name):
+            result = profile.runcall(func, *args, **kwargs)
+
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.cprofile_file = os.path.join(
+            os.path.dirname(self.metrics_file) or '.', f"profile-{stamp}-{os.getpid()}.prof"
+        )
+        try:
+            profile.dump_stats(self.cprofile_file)
+        except OSError as e:
+            print(f"Error writing profile: {e}", file=sys.stderr)
+            self.cprofile_file = None
+        return result
+
+    def write_metrics(self, command, argv=None):
+        """
+        Append this run's measurements to the metrics file as one JSON line.
+
+        Args:
+            command (str): Name of the command that was run
+            argv (list): Command line arguments
+
+        Returns:
+            dict or None: The record written, or None if profiling is off
+        """
+        if not self.enabled:
+            return None
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'command': command,
+            'argv': list(argv) if argv is not None else sys.argv[1:],
+            'pid': os.getpid(),
+            'total_wall_ms': (time.perf_counter() - self._started) * 1000,
+            'phases': self.phases,
+        }
+        if self.cprofile_file:
+            record['cprofile'] = self.cprofile_file
+
+        try:
+            directory = os.path.dirname(self.metrics_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.metrics_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"Error writing metrics: {e}", file=sys.stderr)
+
+        return record
+
+    def print_summary(self, stream=None):
+        """
+        Print a short per-phase table.
+
+        Args:
+            stream: File to write to (defaults to stderr)
+        """
+        if not self.enabled:
+            return
+
+        stream = stream or sys.stderr
+        print(f"{'phase':<14}{'calls':>6}{'wall ms':>11}{'cpu ms':>11}{'peak KB':>11}",
+              file=stream)
+        for name, phase in self.phases.items():
+            peak = phase.get('peak_kb')
+            peak_text = f"{peak:.1f}" if peak is not None else '-'
+            print(f"{name:<14}{phase['calls']:>6}{phase['wall_ms']:>11.2f}"
+                  f"{phase['cpu_ms']:>11.2f}{peak_text:>11}", file=stream)
+        if self.cprofile_file:
+            print(f"cProfile stats: {self.cprofile_file}", file=stream)
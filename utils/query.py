@@ -0,0 +1,503 @@
+"""
+Query Utilities
+Parses filter expressions and runs them over tasks and projects, using indexes when possible
+"""
+
+import bisect
+import heapq
+import json
+import operator
+import os
+import re
+from itertools import chain, islice
+from models import Project, Task
+
+
+INDEX_VERSION = 1
+
+# Field names accepted in expressions for each kind of row
+TASK_FIELDS = ['owner', 'project', 'project_title', 'due', 'id', 'title', 'status', 'assignee']
+PROJECT_FIELDS = ['owner', 'project', 'id', 'title', 'description', 'due', 'tasks', 'completed']
+INT_FIELDS = ['project', 'id', 'tasks', 'completed']
+
+# Longest operators first so "<=" isn't read as "<"
+_CLAUSE = re.compile(r'^\s*([a-z_]+)\s*(<=|>=|!=|=|<|>|~)\s*(.*?)\s*$')
+# A quoted value is matched whole, so an "and" inside it doesn't split the expression
+_AND = re.compile(r'(\'[^\']*\'|"[^"]*")|\s+and\s+', re.IGNORECASE)
+
+# Operators that can't compare against a missing value
+ORDERING_OPS = ('<', '<=', '>', '>=', '~')
+
+
+def _split_clauses(expression):
+    clauses, start = [], 0
+    for match in _AND.finditer(expression):
+        if match.group(1) is None:
+            clauses.append(expression[start:match.start()])
+            start = match.end()
+    clauses.append(expression[start:])
+    return clauses
+
+
+def _contains(value, text):
+    return value is not None and text.lower() in str(value).lower()
+
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '~': _contains,
+}
+
+
+class Condition:
+    """
+    One "field op value" clause of a query.
+    """
+
+    def __init__(self, field, op, value):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def matches(self, row):
+        actual = row.get(self.field)
+        if self.op in ('=', '!=', '~'):
+            return OPERATORS[self.op](actual, self.value)
+        # Ordering comparisons never match missing values
+        if actual is None:
+            return False
+        return OPERATORS[self.op](actual, self.value)
+
+    def __str__(self):
+        value = 'none' if self.value is None else self.value
+        return f"{self.field}{self.op}{value}"
+
+
+class Query:
+    """
+    A compiled filter expression: all conditions must match.
+    """
+
+    def __init__(self, conditions, kind='tasks'):
+        self.conditions = conditions
+        self.kind = kind
+
+    @classmethod
+    def parse(cls, expression, kind='tasks'):
+        """
+        Compile an expression such as "status=in_progress and due<2025-01-01".
+
+        Args:
+            expression (str): Clauses joined by "and" (empty matches everything)
+            kind (str): 'tasks' or 'projects'
+
+        Returns:
+            Query: The compiled query
+
+        Raises:
+            ValueError: If the expression is invalid
+        """
+        fields = TASK_FIELDS if kind == 'tasks' else PROJECT_FIELDS
+        conditions = []
+
+        for clause in _split_clauses(expression.strip()) if expression.strip() else []:
+            match = _CLAUSE.match(clause)
+            if not match:
+                raise ValueError(f"Invalid condition: '{clause}' (expected field=value)")
+
+            field, op, value = match.groups()
+            if field not in fields:
+                raise ValueError(f"Unknown field '{field}' for {kind}. Fields: {', '.join(fields)}")
+
+            quoted = len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"'
+            value = value[1:-1] if quoted else value
+            if value.lower() == 'none' and not quoted:
+                if op in ORDERING_OPS:
+                    raise ValueError(f"'none' can only be used with = or != (got '{clause.strip()}')")
+                value = None
+            elif field in INT_FIELDS:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"Field '{field}' needs a number, got '{value}'")
+            conditions.append(Condition(field, op, value))
+
+        return cls(conditions, kind)
+
+    def matches(self, row):
+        return all(condition.matches(row) for condition in self.conditions)
+
+    def find(self, field, ops):
+        """
+        Get the conditions on a field that use one of the given operators.
+
+        Args:
+            field (str): Field name
+            ops (tuple): Accepted operators
+
+        Returns:
+            list: Matching Condition objects
+        """
+        return [c for c in self.conditions if c.field == field and c.op in ops and c.value is not None]
+
+
+def task_row(user, project, task):
+    """
+    Flatten a task and its context into a row for filtering.
+    """
+    return {
+        'owner': user.email,
+        'project': project.project_id,
+        'project_title': project.title,
+        'due': project.due_date,
+        'id': task.task_id,
+        'title': task.title,
+        'status': task.status,
+        'assignee': task.assigned_to,
+    }
+
+
+def project_row(user, project):
+    """
+    Flatten a project and its context into a row for filtering.
+    """
+    return {
+        'owner': user.email,
+        'project': project.project_id,
+        'id': project.project_id,
+        'title': project.title,
+        'description': project.description,
+        'due': project.due_date,
+        'tasks': project.task_count,
+        'completed': project.count_tasks_by_status('completed'),
+    }
+
+
+def format_row(row, kind):
+    """
+    Format a result row for display.
+    """
+    if kind == 'tasks':
+        assigned = row['assignee'] if row['assignee'] else "Unassigned"
+        return (f"[{row['project']}/{row['id']}] {row['title']} - {row['status']} "
+                f"(Assigned to: {assigned}) | {row['project_title']}, due {row['due']}, owner {row['owner']}")
+    return (f"[{row['id']}] {row['title']} - {row['completed']}/{row['tasks']} completed "
+            f"| due {row['due']}, owner {row['owner']}")
+
+
+class QueryIndex:
+    """
+    Secondary indexes (status, assignee, due date) over users.json.
+
+    Stored in query.idx and tied to the data file's size and mtime like the
+    offset index. Postings are [owner_email, project_id, task_id] triples;
+    the due index holds sorted [due_date, owner_email, project_id] entries.
+    """
+
+    def __init__(self, data_dir='data'):
+        """
+        Initialize the QueryIndex.
+
+        Args:
+            data_dir (str): Directory where data files are stored
+        """
+        self.index_file = os.path.join(data_dir, 'query.idx')
+
+    @staticmethod
+    def empty():
+        return {'status': {}, 'assignee': {}, 'due': []}
+
+    @staticmethod
+    def add_user(postings, user_data):
+        """
+        Add one user's projects and tasks to the postings.
+
+        Args:
+            postings (dict): Postings being built (modified in place)
+            user_data (dict): User dictionary as produced by User.to_dict()
+        """
+        email = user_data['email']
+        for project in user_data.get('projects', []):
+            project_id = project['project_id']
+            postings['due'].append([project['due_date'], email, project_id])
+            for task in project.get('tasks', []):
+                entry = [email, project_id, task['task_id']]
+                postings['status'].setdefault(task['status'], []).append(entry)
+                if task.get('assigned_to'):
+                    postings['assignee'].setdefault(task['assigned_to'], []).append(entry)
+
+    @staticmethod
+    def remove_user(postings, email):
+        """
+        Remove every entry owned by one user from the postings.
+
+        Args:
+            postings (dict): Postings (modified in place)
+            email (str): Owner email address
+        """
+        for field in ('status', 'assignee'):
+            for key in list(postings[field]):
+                kept = [entry for entry in postings[field][key] if entry[0] != email]
+                if kept:
+                    postings[field][key] = kept
+                else:
+                    del postings[field][key]
+        postings['due'] = [entry for entry in postings['due'] if entry[1] != email]
+
+    def read(self, data_file):
+        """
+        Load the postings if they match the current data file.
+
+        Args:
+            data_file (str): Path of the data file the index describes
+
+        Returns:
+            dict or None: The postings, or None if missing or stale
+        """
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            stat = os.stat(data_file)
+            if index.get('version') != INDEX_VERSION:
+                return None
+            if index['size'] != stat.st_size or index['mtime_ns'] != stat.st_mtime_ns:
+                return None
+            return index['postings']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, postings, data_file):
+        """
+        Write the postings for the current data file.
+
+        Args:
+            postings (dict): Postings to store
+            data_file (str): Path of the data file the index describes
+        """
+        postings['due'].sort()
+        temp_file = self.index_file + '.tmp'
+        try:
+            stat = os.stat(data_file)
+            with open(temp_file, 'w') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'postings': postings,
+                }, f)
+            os.replace(temp_file, self.index_file)
+        except OSError:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+class QueryEngine:
+    """
+    Runs a Query, narrowing the candidates with indexes before scanning.
+    """
+
+    def __init__(self, data_manager):
+        """
+        Initialize the QueryEngine.
+
+        Args:
+            data_manager (DataManager): Source of users and indexes
+        """
+        self.data_manager = data_manager
+        self.plan = []
+
+    def run(self, query, order_by=None, limit=None, include_archived=False):
+        """
+        Run a query.
+
+        Args:
+            query (Query): Compiled query
+            order_by (str): Field to sort by, prefixed with '-' for descending
+            limit (int): Maximum number of rows
+            include_archived (bool): Also search the archive
+
+        Returns:
+            list: Matching rows
+        """
+        if limit is not None and limit < 0:
+            raise ValueError("Limit must be zero or more")
+
+        self.plan = []
+        rows = (row for row in self._candidate_rows(query) if query.matches(row))
+        if include_archived:
+            rows = chain(rows, (row for row in self._archived_rows(query) if query.matches(row)))
+
+        try:
+            return self._collect(rows, query, order_by, limit)
+        finally:
+            if include_archived:
+                self.plan.append("then stream archive segments (until the limit is reached)")
+
+    def _collect(self, rows, query, order_by, limit):
+        if not order_by:
+            return list(islice(rows, limit)) if limit is not None else list(rows)
+
+        descending = order_by.startswith('-')
+        field = order_by.lstrip('-')
+        fields = TASK_FIELDS if query.kind == 'tasks' else PROJECT_FIELDS
+        if field not in fields:
+            raise ValueError(f"Cannot order by '{field}'. Fields: {', '.join(fields)}")
+
+        # Missing values sort last either way
+        if descending:
+            key = lambda row: (row[field] is not None, row[field] if row[field] is not None else 0)
+            if limit is not None:
+                return heapq.nlargest(limit, rows, key=key)
+            return sorted(rows, key=key, reverse=True)
+
+        key = lambda row: (row[field] is None, row[field] if row[field] is not None else 0)
+        if limit is not None:
+            return heapq.nsmallest(limit, rows, key=key)
+        return sorted(rows, key=key)
+
+    def _candidate_rows(self, query):
+        owners = query.find('owner', ('=',))
+        if owners:
+            email = owners[0].value
+            load_user = self._user_loader()
+            self.plan.append(f"owner index: load only {email} ({self._user_load_path()})")
+            user = load_user(email)
+            if user:
+                yield from self._rows_for_user(query, user)
+            return
+
+        postings = self.data_manager.load_query_index()
+        candidates = self._index_candidates(query, postings) if postings is not None else None
+        if candidates is None:
+            reason = "no indexed condition" if postings is not None else "query index unavailable"
+            self.plan.append(f"full scan of all users ({reason})")
+            for user in self.data_manager.load_users():
+                yield from self._rows_for_user(query, user)
+            return
+
+        by_owner = {}
+        for email, project_id, task_id in candidates:
+            by_owner.setdefault(email, {}).setdefault(project_id, set()).add(task_id)
+        load_user = self._user_loader()
+        self.plan.append(f"load {len(by_owner)} user(s) ({self._user_load_path()}), "
+                         f"check {len(candidates)} candidate(s)")
+
+        for email in sorted(by_owner):
+            user = load_user(email)
+            if not user:
+                continue
+            for project_id, task_ids in sorted(by_owner[email].items()):
+                project = user.get_project(project_id)
+                if not project:
+                    continue
+                if query.kind == 'projects':
+                    yield project_row(user, project)
+                elif None in task_ids:
+                    for task in project.tasks:
+                        yield task_row(user, project, task)
+                else:
+                    for task_id in sorted(task_ids):
+                        task = project.get_task(task_id)
+                        if task:
+                            yield task_row(user, project, task)
+
+    def _index_candidates(self, query, postings):
+        """
+        Pick the most selective indexed condition and return its candidates.
+
+        Returns:
+            set or None: (email, project_id, task_id or None) tuples, or None
+                         if no condition can use an index
+        """
+        options = []
+        if query.kind == 'tasks':
+            for field in ('status', 'assignee'):
+                for condition in query.find(field, ('=',)):
+                    entries = postings[field].get(condition.value, [])
+                    options.append((len(entries), str(condition), entries, False))
+
+        due_conditions = query.find('due', ('=', '<', '<=', '>', '>='))
+        if due_conditions:
+            due = postings['due']
+            low, high = 0, len(due)
+            for condition in due_conditions:
+                # Sentinel keys sort before/after every [due, email, id] entry with that date
+                before = bisect.bisect_left(due, [condition.value])
+                after = bisect.bisect_left(due, [condition.value + '\uffff'])
+                if condition.op == '=':
+                    low, high = max(low, before), min(high, after)
+                elif condition.op == '<':
+                    high = min(high, before)
+                elif condition.op == '<=':
+                    high = min(high, after)
+                elif condition.op == '>':
+                    low = max(low, after)
+                else:
+                    low = max(low, before)
+            entries = [[email, project_id, None] for _, email, project_id in due[low:high]]
+            label = ' and '.join(str(c) for c in due_conditions)
+            options.append((len(entries), label, entries, True))
+
+        if not options:
+            return None
+
+        size, label, entries, _ = min(options, key=lambda option: option[0])
+        self.plan.append(f"index lookup on {label}: {size} posting(s)")
+        return {tuple(entry) for entry in entries}
+
+    def _rows_for_user(self, query, user):
+        for project in user.projects:
+            if query.kind == 'projects':
+                yield project_row(user, project)
+                continue
+            for task in project.tasks:
+                yield task_row(user, project, task)
+
+    def _archived_rows(self, query):
+        owners = query.find('owner', ('=',))
+        entries = self.data_manager.archive.load_entries(owners[0].value if owners else None)
+        for entry in entries:
+            owner = _Owner(entry['owner_email'])
+            if entry['kind'] == 'project':
+                project = Project.from_dict(entry['data'])
+                if query.kind == 'projects':
+                    yield project_row(owner, project)
+                else:
+                    for task in project.tasks:
+                        yield task_row(owner, project, task)
+            elif query.kind == 'tasks':
+                # The live project may be gone; show what the archive knows
+                task = Task.from_dict(entry['data'])
+                project = _ArchivedProject(entry['project_id'])
+                yield task_row(owner, project, task)
+
+    def _user_loader(self):
+        # Without the offset index every single-user load is a full load, so do it once
+        self._offset_index = self.data_manager.has_offset_index()
+        if self._offset_index:
+            return self.data_manager.load_user
+        users = {user.email: user for user in self.data_manager.load_users()}
+        return users.get
+
+    def _user_load_path(self):
+        if self._offset_index:
+            return "offset index + mmap"
+        return "one full load, no offset index"
+
+
+class _Owner:
+    def __init__(self, email):
+        self.email = email
+
+
+class _ArchivedProject:
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.title = '(archived task)'
+        self.due_date = None
+
@@ -0,0 +1,309 @@
+"""
+Report Utilities
+Workload and progress aggregates that are kept up to date as data changes
+"""
+
+import json
+import os
+from datetime import datetime
+from models import Project, Task
+
+
+REPORT_VERSION = 1
+STATUSES = ['pending', 'in_progress', 'completed']
+
+
+def _open_task_count(project):
+    return project.task_count - project.count_tasks_by_status('completed')
+
+
+class ReportStore:
+    """
+    Per-owner and per-assignee task counts stored in reports.json.
+
+    The aggregates are updated by the CLI's mutating commands instead of
+    being recomputed, so a report never has to walk the data. Each owner
+    also keeps the due dates of projects that still have open tasks, which
+    is enough to count overdue projects for any date.
+
+    The file records the path, size and mtime of the data file (snapshot)
+    it matches; if the data changed some other way the aggregates are
+    treated as stale until they are rebuilt. Only write it while holding
+    the DataManager's write lock.
+    """
+
+    def __init__(self, data_dir='data'):
+        """
+        Initialize the ReportStore.
+
+        Args:
+            data_dir (str): Directory where data files are stored
+        """
+        self.report_file = os.path.join(data_dir, 'reports.json')
+        self.owners = {}
+        self.assignees = {}
+        self.stale = False
+
+    def load(self, data_file):
+        """
+        Load the aggregates and check they match the data file.
+
+        Args:
+            data_file (str): Path of the data file the aggregates describe
+        """
+        self.owners, self.assignees = {}, {}
+        data_exists = os.path.exists(data_file)
+
+        try:
+            with open(self.report_file, 'r') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            # Nothing saved yet is only consistent with no data at all
+            self.stale = data_exists
+            return
+
+        if not data_exists:
+            self.stale = False
+            return
+
+        stat = os.stat(data_file)
+        self.stale = (
+            report.get('version') != REPORT_VERSION
+            or report.get('data_file') != data_file
+            or report.get('size') != stat.st_size
+            or report.get('mtime_ns') != stat.st_mtime_ns
+        )
+        if not self.stale:
+            self.owners = report['owners']
+            self.assignees = report['assignees']
+
+    def save(self, data_file):
+        """
+        Write the aggregates for the current data file.
+
+        Args:
+            data_file (str): Path of the data file the aggregates describe
+        """
+        if self.stale or not os.path.exists(data_file):
+            return
+
+        stat = os.stat(data_file)
+        temp_file = self.report_file + '.tmp'
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump({
+                    'version': REPORT_VERSION,
+                    'data_file': data_file,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'owners': self.owners,
+                    'assignees': self.assignees,
+                }, f)
+            os.replace(temp_file, self.report_file)
+        except OSError as e:
+            print(f"Error saving reports: {e}")
+
+    # Incremental updates (no-ops while stale)
+
+    def user_added(self, email):
+        if not self.stale:
+            self._owner(email)
+
+    def user_removed(self, user, archive_entries=()):
+        """
+        Record a deleted user, along with their archive entries that were dropped.
+        """
+        if self.stale:
+            return
+        for project in user.projects:
+            self.project_removed(user.email, project)
+        for entry in archive_entries:
+            self._count_archive_entry(entry, -1)
+        self.owners.pop(user.email, None)
+
+    def project_added(self, owner_email, project):
+        if self.stale:
+            return
+        self._owner(owner_email)['projects'] += 1
+        for task in project.tasks:
+            self._count(owner_email, task.assigned_to, task.status, 1)
+        if _open_task_count(project) > 0:
+            self._adjust_open_due(owner_email, project.due_date, 1)
+
+    def project_removed(self, owner_email, project, archive_entries=()):
+        """
+        Record a deleted project, along with its archive entries that were dropped.
+        """
+        if self.stale:
+            return
+        self._owner(owner_email)['projects'] -= 1
+        for task in project.tasks:
+            self._count(owner_email, task.assigned_to, task.status, -1)
+        if _open_task_count(project) > 0:
+            self._adjust_open_due(owner_email, project.due_date, -1)
+        for entry in archive_entries:
+            self._count_archive_entry(entry, -1)
+
+    def task_added(self, owner_email, project, task):
+        """
+        Record a task that has just been added to a project.
+        """
+        if self.stale:
+            return
+        self._count(owner_email, task.assigned_to, task.status, 1)
+        if task.status != 'completed' and _open_task_count(project) == 1:
+            self._adjust_open_due(owner_email, project.due_date, 1)
+
+    def task_status_changed(self, owner_email, project, task, old_status):
+        """
+        Record a task whose status has just changed from old_status.
+        """
+        if self.stale or old_status == task.status:
+            return
+        self._count(owner_email, task.assigned_to, old_status, -1)
+        self._count(owner_email, task.assigned_to, task.status, 1)
+
+        open_after = _open_task_count(project)
+        open_before = (open_after - (task.status != 'completed')
+                       + (old_status != 'completed'))
+        if open_before == 0 and open_after > 0:
+            self._adjust_open_due(owner_email, project.due_date, 1)
+        elif open_before > 0 and open_after == 0:
+            self._adjust_open_due(owner_email, project.due_date, -1)
+
+    def task_reassigned(self, task, old_assignee):
+        """
+        Record a task whose assignee has just changed from old_assignee.
+        """
+        if self.stale or old_assignee == task.assigned_to:
+            return
+        if old_assignee:
+            self._assignee(old_assignee)[task.status] -= 1
+            self._drop_empty_assignee(old_assignee)
+        if task.assigned_to:
+            self._assignee(task.assigned_to)[task.status] += 1
+
+    # Reading
+
+    def owner_summary(self, email, today=None):
+        """
+        Get the report for one project owner.
+
+        Args:
+            email (str): Owner email address
+            today (str): Date to count overdue projects against (YYYY-MM-DD)
+
+        Returns:
+            dict or None: Summary, or None if there are no aggregates for them
+        """
+        owner = self.owners.get(email)
+        if owner is None:
+            return None
+
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        summary = {status: owner[status] for status in STATUSES}
+        summary['projects'] = owner['projects']
+        summary['overdue_projects'] = sum(
+            count for due, count in owner['open_due'].items() if due < today
+        )
+        summary['completion'] = _ratio(summary)
+        return summary
+
+    def assignee_summary(self, email):
+        """
+        Get the report for one assignee.
+
+        Args:
+            email (str): Assignee email address
+
+        Returns:
+            dict or None: Summary, or None if nothing is assigned to them
+        """
+        assignee = self.assignees.get(email)
+        if assignee is None:
+            return None
+        summary = dict(assignee)
+        summary['completion'] = _ratio(summary)
+        return summary
+
+    # Rebuilding
+
+    def rebuild(self, users, archive_entries):
+        """
+        Recompute every aggregate from the data and the archive.
+
+        Args:
+            users (list): All User objects
+            archive_entries (list): All archive entry dictionaries
+
+        Returns:
+            list: Differences from the previously stored aggregates
+                  (empty if they were correct)
+        """
+        old_owners, old_assignees, was_stale = self.owners, self.assignees, self.stale
+        self.owners, self.assignees, self.stale = {}, {}, False
+
+        for user in users:
+            self.user_added(user.email)
+            for project in user.projects:
+                self.project_added(user.email, project)
+
+        # Archived work still counts towards progress
+        for entry in archive_entries:
+            self._count_archive_entry(entry, 1)
+
+        if was_stale:
+            return ["stored aggregates were missing or out of date"]
+        return (_differences('owner', old_owners, self.owners)
+                + _differences('assignee', old_assignees, self.assignees))
+
+    def _count_archive_entry(self, entry, delta):
+        if entry['kind'] == 'project':
+            project = Project.from_dict(entry['data'])
+            if delta > 0:
+                self.project_added(entry['owner_email'], project)
+            else:
+                self.project_removed(entry['owner_email'], project)
+        else:
+            task = Task.from_dict(entry['data'])
+            self._count(entry['owner_email'], task.assigned_to, task.status, delta)
+
+    def _owner(self, email):
+        if email not in self.owners:
+            self.owners[email] = {'projects': 0, 'pending': 0, 'in_progress': 0,
+                                  'completed': 0, 'open_due': {}}
+        return self.owners[email]
+
+    def _assignee(self, email):
+        if email not in self.assignees:
+            self.assignees[email] = {status: 0 for status in STATUSES}
+        return self.assignees[email]
+
+    def _drop_empty_assignee(self, email):
+        if not any(self.assignees[email].values()):
+            del self.assignees[email]
+
+    def _count(self, owner_email, assignee, status, delta):
+        self._owner(owner_email)[status] += delta
+        if assignee:
+            self._assignee(assignee)[status] += delta
+            self._drop_empty_assignee(assignee)
+
+    def _adjust_open_due(self, owner_email, due_date, delta):
+        open_due = self._owner(owner_email)['open_due']
+        open_due[due_date] = open_due.get(due_date, 0) + delta
+        if not open_due[due_date]:
+            del open_due[due_date]
+
+
+def _ratio(summary):
+    total = sum(summary[status] for status in STATUSES)
+    return summary['completed'] / total if total else 0.0
+
+
+def _differences(label, old, new):
+    differences = []
+    for email in sorted(set(old) | set(new)):
+        if old.get(email) != new.get(email):
+            differences.append(f"{label} {email}: stored {old.get(email)}, actual {new.get(email)}")
+    return differences
@@ -0,0 +1,306 @@
+"""
+Snapshot Utilities
+Generation-numbered, immutable copies of the data files behind a pointer file
+"""
+
+import atexit
+import os
+import shutil
+import socket
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; writers are then not serialized against each other
+    fcntl = None
+
+
+# Leases from another host can't be checked by PID, so they expire instead
+LEASE_MAX_AGE = 24 * 60 * 60
+
+
+class SnapshotStore:
+    """
+    Keeps each saved version of the data in its own numbered directory.
+
+    Layout under data/snapshots/:
+
+        CURRENT          number of the generation readers should use
+        000007/          users.json and the files derived from it
+        leases/          one file per process reading a generation
+        write.lock       held (flock) by the process writing a generation
+
+    The data file in a snapshot directory is never modified once CURRENT
+    points at it. Writers build the next generation in a new directory
+    and switch CURRENT with an atomic rename, so readers never take the
+    lock and never see a half-written file. Generation 0 is the data directory
+    itself, i.e. data saved before snapshots existed.
+
+    Old generations are removed by the next writer once no lease
+    refers to them.
+    """
+
+    def __init__(self, data_dir='data', legacy_files=()):
+        """
+        Initialize the SnapshotStore.
+
+        Args:
+            data_dir (str): Directory where data files are stored
+            legacy_files (tuple): File names that make up generation 0
+        """
+        self.data_dir = data_dir
+        self.snapshot_dir = os.path.join(data_dir, 'snapshots')
+        self.current_file = os.path.join(self.snapshot_dir, 'CURRENT')
+        self.lease_dir = os.path.join(self.snapshot_dir, 'leases')
+        self.lock_file = os.path.join(self.snapshot_dir, 'write.lock')
+        self.legacy_files = legacy_files
+        self._lock_depth = 0
+        self._lock_handle = None
+
+    def directory(self, generation):
+        """
+        Get the directory holding a generation's files.
+
+        Args:
+            generation (int): Generation number
+
+        Returns:
+            str: Directory path
+        """
+        if generation == 0:
+            return self.data_dir
+        return os.path.join(self.snapshot_dir, f"{generation:06d}")
+
+    def current(self):
+        """
+        Get the generation readers should use.
+
+        Returns:
+            int: Generation number (0 if nothing has been published yet)
+        """
+        try:
+            with open(self.current_file, 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def pin(self):
+        """
+        Lease the current generation so it isn't removed while it is read.
+
+        Returns:
+            tuple: (generation number, lease file path)
+        """
+        while True:
+            generation = self.current()
+            lease = self.acquire(generation)
+            # Garbage collection only runs after CURRENT moves on, so if it
+            # hasn't moved the lease was in place before anyone looked for it
+            if self.current() == generation:
+                return generation, lease
+            self.release(lease)
+
+    def acquire(self, generation):
+        """
+        Create a lease on a generation for this process.
+
+        Args:
+            generation (int): Generation number
+
+        Returns:
+            str: Lease file path, to pass to release()
+        """
+        if not os.path.exists(self.lease_dir):
+            os.makedirs(self.lease_dir, exist_ok=True)
+
+        lease = os.path.join(
+            self.lease_dir,
+            f"{generation}.{socket.gethostname()}.{os.getpid()}.{time.monotonic_ns()}"
+        )
+        with open(lease, 'w'):
+            pass
+        atexit.register(self.release, lease)
+        return lease
+
+    def release(self, lease):
+        """
+        Remove a lease (safe to call more than once).
+
+        Args:
+            lease (str): Lease file path, or None
+        """
+        if lease is None:
+            return
+        try:
+            os.remove(lease)
+        except OSError:
+            pass
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the writer lock. Re-entrant within one SnapshotStore.
+        """
+        if self._lock_depth == 0:
+            if not os.path.exists(self.snapshot_dir):
+                os.makedirs(self.snapshot_dir, exist_ok=True)
+            self._lock_handle = open(self.lock_file, 'a')
+            if fcntl is not None:
+                fcntl.flock(self._lock_handle, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                # Closing the file releases the flock
+                self._lock_handle.close()
+                self._lock_handle = None
+
+    def prepare(self):
+        """
+        Create an empty directory for the next generation. Call with the lock held.
+
+        Returns:
+            int: The new generation number
+        """
+        generation = self.current() + 1
+        directory = self.directory(generation)
+        # Left over from a writer that crashed before publishing
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        return generation
+
+    def discard(self, generation):
+        """
+        Remove an unpublished generation.
+
+        Args:
+            generation (int): Generation number from prepare()
+        """
+        if generation:
+            shutil.rmtree(self.directory(generation), ignore_errors=True)
+
+    def publish(self, generation):
+        """
+        Point CURRENT at a fully written generation. Call with the lock held.
+
+        Args:
+            generation (int): Generation number from prepare()
+        """
+        _fsync_directory(self.directory(generation))
+
+        temp_file = self.current_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            f.write(f"{generation}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.current_file)
+        _fsync_directory(self.snapshot_dir)
+
+    def collect_garbage(self):
+        """
+        Remove generations other than the current one that no live lease refers to.
+        Call with the lock held.
+
+        Returns:
+            int: Number of generations removed
+        """
+        current = self.current()
+        leased = self._leased_generations()
+
+        removed = 0
+        for generation in self._generations():
+            if generation == current or generation in leased:
+                continue
+            if generation == 0:
+                self._remove_legacy_files()
+            else:
+                shutil.rmtree(self.directory(generation), ignore_errors=True)
+            removed += 1
+        return removed
+
+    def _generations(self):
+        """
+        List the generations present on disk.
+
+        Returns:
+            list: Generation numbers
+        """
+        generations = []
+        if any(os.path.exists(os.path.join(self.data_dir, name)) for name in self.legacy_files):
+            generations.append(0)
+        try:
+            names = os.listdir(self.snapshot_dir)
+        except OSError:
+            names = []
+        generations.extend(int(name) for name in names if name.isdigit())
+        return generations
+
+    def _leased_generations(self):
+        """
+        Get the generations with a live lease, removing leases of dead processes.
+
+        Returns:
+            set: Generation numbers
+        """
+        try:
+            names = os.listdir(self.lease_dir)
+        except OSError:
+            return set()
+
+        host = socket.gethostname()
+        leased = set()
+        for name in names:
+            path = os.path.join(self.lease_dir, name)
+            try:
+                generation, rest = name.split('.', 1)
+                lease_host, pid, _ = rest.rsplit('.', 2)
+                generation, pid = int(generation), int(pid)
+            except ValueError:
+                continue
+
+            if _lease_alive(path, lease_host == host, pid):
+                leased.add(generation)
+            else:
+                self.release(path)
+        return leased
+
+    def _remove_legacy_files(self):
+        """
+        Remove the data files of generation 0.
+        """
+        for name in self.legacy_files:
+            try:
+                os.remove(os.path.join(self.data_dir, name))
+            except OSError:
+                pass
+
+
+def _lease_alive(path, same_host, pid):
+    if same_host and os.name == 'posix':
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Exists but belongs to another user
+            return True
+        return True
+    try:
+        return time.time() - os.path.getmtime(path) < LEASE_MAX_AGE
+    except OSError:
+        return False
+
+
+def _fsync_directory(path):
+    # Makes renames and new files in the directory durable (not possible on Windows)
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)